@@ -8,6 +8,8 @@ from flask_cors import CORS
 
 import sqlite3
 
+import etag
+
 
 DATABASE_PATH = Path(__file__).with_name("analytics.db")
 
@@ -55,6 +57,7 @@ def create_app() -> Flask:
     init_db()
     app = Flask(__name__)
     CORS(app)
+    etag.init_app(app)
 
     @app.get("/health")
     def health():
@@ -1,15 +1,31 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict
+from threading import Event, Lock, Thread
+from typing import Dict, Iterator, List, Tuple
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
-from werkzeug.security import check_password_hash, generate_password_hash
 
+import atexit
+import json
+import os
 import sqlite3
+import time
+
+from password_hashing import HashingBusy, hash_password, needs_rehash, verify_password
+from tokens import InvalidToken, issue_token, revocations, verify_token
+import etag
 
 
 DATABASE_PATH = Path(__file__).with_name("auth.db")
+MAX_BULK_IDS = 500
+MAX_PAGE_LIMIT = 1000
+STREAM_BATCH_SIZE = 500
+LOGIN_EVENTS_BATCH_SIZE = int(os.getenv("LOGIN_EVENTS_BATCH_SIZE", "100"))
+LOGIN_EVENTS_FLUSH_INTERVAL = float(os.getenv("LOGIN_EVENTS_FLUSH_INTERVAL", "1.0"))
+LOGIN_EVENTS_RETENTION_DAYS = int(os.getenv("LOGIN_EVENTS_RETENTION_DAYS", "30"))
+LOGIN_EVENTS_ROLLUP_BATCH = int(os.getenv("LOGIN_EVENTS_ROLLUP_BATCH", "5000"))
+LOGIN_EVENTS_ROLLUP_INTERVAL = float(os.getenv("LOGIN_EVENTS_ROLLUP_INTERVAL", "3600"))
 
 
 def _now() -> str:
@@ -46,18 +62,259 @@ def init_db():
             )
             """
         )
+        # Eventos antigos viram totais diários (rollup_login_events); o índice em created_at
+        # atende à varredura por idade
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_login_events_created_at ON login_events (created_at)"
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS login_events_daily (
+                user_id INTEGER NOT NULL,
+                day TEXT NOT NULL,
+                successes INTEGER NOT NULL DEFAULT 0,
+                failures INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, day)
+            )
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_login_events_daily_day ON login_events_daily (day)"
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS revoked_tokens (
+                jti TEXT PRIMARY KEY,
+                expires_at INTEGER NOT NULL
+            )
+            """
+        )
+        # Contadores para /metrics, mantidos pelos triggers abaixo na mesma transação do INSERT
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS auth_counters (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                users_total INTEGER NOT NULL DEFAULT 0,
+                login_success INTEGER NOT NULL DEFAULT 0,
+                login_failure INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        conn.execute(
+            """
+            INSERT OR IGNORE INTO auth_counters (id, users_total, login_success, login_failure)
+            SELECT 1,
+                   (SELECT COUNT(*) FROM users),
+                   (SELECT COUNT(*) FROM login_events WHERE success = 1),
+                   (SELECT COUNT(*) FROM login_events WHERE success = 0)
+            """
+        )
+        conn.executescript(
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_users_count_insert AFTER INSERT ON users
+            BEGIN
+                UPDATE auth_counters SET users_total = users_total + 1 WHERE id = 1;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_users_count_delete AFTER DELETE ON users
+            BEGIN
+                UPDATE auth_counters SET users_total = users_total - 1 WHERE id = 1;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_login_events_count AFTER INSERT ON login_events
+            BEGIN
+                UPDATE auth_counters
+                SET login_success = login_success + (NEW.success = 1),
+                    login_failure = login_failure + (NEW.success = 0)
+                WHERE id = 1;
+            END;
+            """
+        )
         conn.commit()
 
 
+class LoginEventBuffer:
+    """Group commit for login_events.
+
+    Events are kept in memory and written with a single executemany/commit once
+    LOGIN_EVENTS_BATCH_SIZE events are pending or every LOGIN_EVENTS_FLUSH_INTERVAL
+    seconds, whichever comes first. Pending events are flushed at interpreter exit.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float):
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._pending: List[Tuple[int, int, str]] = []
+        self._lock = Lock()
+        self._flush_lock = Lock()
+        self._wakeup = Event()
+        self._started = False
+
+    def start(self) -> None:
+        if self._started or self.batch_size == 1:
+            return
+        self._started = True
+        Thread(target=self._run, name="login-events-flush", daemon=True).start()
+        atexit.register(self.flush)
+
+    def add(self, user_id: int, success: bool) -> None:
+        with self._lock:
+            self._pending.append((user_id, int(success), _now()))
+            full = len(self._pending) >= self.batch_size
+        if full or not self._started:
+            if self._started:
+                self._wakeup.set()
+            else:
+                self.flush()
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            try:
+                with get_conn() as conn:
+                    conn.executemany(
+                        "INSERT INTO login_events (user_id, success, created_at) VALUES (?, ?, ?)",
+                        batch,
+                    )
+                    conn.commit()
+            except sqlite3.Error as e:
+                print("[LOGIN_EVENTS_FLUSH_ERROR]", e)
+                with self._lock:
+                    self._pending[:0] = batch
+                return 0
+            return len(batch)
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+login_events = LoginEventBuffer(LOGIN_EVENTS_BATCH_SIZE, LOGIN_EVENTS_FLUSH_INTERVAL)
+
+
+def rollup_login_events(retention_days: int = LOGIN_EVENTS_RETENTION_DAYS) -> Dict[str, int]:
+    """Compacta eventos mais antigos que a janela de retenção em login_events_daily.
+
+    Trabalha em lotes de LOGIN_EVENTS_ROLLUP_BATCH linhas; cada lote é somado na tabela
+    diária e apagado na mesma transação, então o job pode ser interrompido e reexecutado.
+    """
+    cutoff = (datetime.utcnow() - timedelta(days=retention_days)).isoformat(timespec="seconds")
+    rolled = batches = 0
+    while True:
+        with get_conn() as conn:
+            max_id = conn.execute(
+                """
+                SELECT MAX(id) FROM (
+                    SELECT id FROM login_events WHERE created_at < ? ORDER BY id LIMIT ?
+                )
+                """,
+                (cutoff, LOGIN_EVENTS_ROLLUP_BATCH),
+            ).fetchone()[0]
+            if max_id is None:
+                break
+            conn.execute(
+                """
+                INSERT INTO login_events_daily (user_id, day, successes, failures)
+                SELECT user_id, substr(created_at, 1, 10), SUM(success = 1), SUM(success = 0)
+                FROM login_events
+                WHERE id <= ? AND created_at < ?
+                GROUP BY user_id, substr(created_at, 1, 10)
+                ON CONFLICT (user_id, day) DO UPDATE SET
+                    successes = successes + excluded.successes,
+                    failures = failures + excluded.failures
+                """,
+                (max_id, cutoff),
+            )
+            deleted = conn.execute(
+                "DELETE FROM login_events WHERE id <= ? AND created_at < ?", (max_id, cutoff)
+            ).rowcount
+            conn.commit()
+        rolled += deleted
+        batches += 1
+    return {"rolled_up": rolled, "batches": batches}
+
+
+def _rollup_loop() -> None:
+    while True:
+        try:
+            rollup_login_events()
+        except sqlite3.Error as e:
+            print("[LOGIN_EVENTS_ROLLUP_ERROR]", e)
+        time.sleep(LOGIN_EVENTS_ROLLUP_INTERVAL)
+
+
+def _is_token_revoked(jti: str) -> bool:
+    with get_conn() as conn:
+        return conn.execute("SELECT 1 FROM revoked_tokens WHERE jti = ?", (jti,)).fetchone() is not None
+
+
+def _token_from_request() -> str:
+    header = request.headers.get("Authorization", "")
+    if header.lower().startswith("bearer "):
+        return header[7:].strip()
+    payload = request.get_json(silent=True) or {}
+    return (payload.get("token") or "").strip()
+
+
 def _serialize_user(row: sqlite3.Row) -> Dict:
     return {"id": row["id"], "email": row["email"], "created_at": row["created_at"]}
 
 
+def iter_users(after_id: int = 0, limit: int | None = None) -> Iterator[sqlite3.Row]:
+    """Yield users with id > after_id in id order, in batches of STREAM_BATCH_SIZE.
+
+    Each batch is a fresh keyset query (id > last id) on a connection closed before
+    yielding: an open cursor would hold SQLite's SHARED lock for the whole stream and
+    make every writer fail with "database is locked" while a slow client reads.
+    """
+    remaining = limit
+    while remaining is None or remaining > 0:
+        batch = STREAM_BATCH_SIZE if remaining is None else min(STREAM_BATCH_SIZE, remaining)
+        conn = get_conn()
+        try:
+            rows = conn.execute(
+                "SELECT id, email, created_at FROM users WHERE id > ? ORDER BY id ASC LIMIT ?",
+                (after_id, batch),
+            ).fetchall()
+        finally:
+            conn.close()
+        if not rows:
+            break
+        after_id = rows[-1]["id"]
+        if remaining is not None:
+            remaining -= len(rows)
+        yield from rows
+        if len(rows) < batch:
+            break
+
+
+def _parse_id_list(raw: str) -> List[int] | None:
+    """Parse a comma separated id list ("1,2,3"); returns None when malformed."""
+    ids: List[int] = []
+    for part in raw.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if not part.isdigit():
+            return None
+        ids.append(int(part))
+    return list(dict.fromkeys(ids))
+
+
 def create_app() -> Flask:
     """Factory that configures and returns the Flask app."""
     init_db()
+    login_events.start()
+    if LOGIN_EVENTS_ROLLUP_INTERVAL > 0:
+        Thread(target=_rollup_loop, name="login-events-rollup", daemon=True).start()
     app = Flask(__name__)
     CORS(app)
+    etag.init_app(app)
 
     @app.get("/health")
     def health():
@@ -74,7 +331,16 @@ def create_app() -> Flask:
         if len(password) < 6:
             return jsonify(error="password deve ter pelo menos 6 caracteres"), 400
 
-        password_hash = generate_password_hash(password)
+        # Rejeita email duplicado pelo índice UNIQUE antes de pagar pelo hash
+        with get_conn() as conn:
+            exists = conn.execute("SELECT 1 FROM users WHERE email = ?", (email,)).fetchone()
+        if exists:
+            return jsonify(error="email já cadastrado"), 409
+
+        try:
+            password_hash = hash_password(password)
+        except HashingBusy:
+            return jsonify(error="serviço ocupado, tente novamente"), 503
         try:
             with get_conn() as conn:
                 cursor = conn.execute(
@@ -103,23 +369,67 @@ def create_app() -> Flask:
                 (email,),
             ).fetchone()
 
-        if not user or not check_password_hash(user["password_hash"], password):
+        try:
+            valid = bool(user) and verify_password(user["password_hash"], password)
+        except HashingBusy:
+            return jsonify(error="serviço ocupado, tente novamente"), 503
+        if not valid:
             _record_login_event(user_id=user["id"] if user else None, success=False)
             return jsonify(error="credenciais inválidas"), 401
 
+        if needs_rehash(user["password_hash"]):
+            # Parâmetros de hash mudaram: regrava com a configuração atual (melhor esforço)
+            try:
+                new_hash = hash_password(password)
+                with get_conn() as conn:
+                    conn.execute(
+                        "UPDATE users SET password_hash = ? WHERE id = ? AND password_hash = ?",
+                        (new_hash, user["id"], user["password_hash"]),
+                    )
+                    conn.commit()
+            except HashingBusy:
+                pass
+
         _record_login_event(user_id=user["id"], success=True)
         data = _serialize_user(user)
-        return jsonify(message="login ok", user=data)
-
-    def _record_login_event(user_id: int | None, success: bool) -> None:
-        if user_id is None:
-            return
+        session = issue_token(user["id"], user["email"])
+        return jsonify(message="login ok", user=data, token=session["token"], expires_at=session["expires_at"])
+
+    @app.post("/tokens/verify")
+    def verify_session_token():
+        """Valida um token (Authorization: Bearer ... ou {"token": ...}) sem consultar users."""
+        token = _token_from_request()
+        if not token:
+            return jsonify(valid=False, error="token é obrigatório"), 400
+        try:
+            claims = verify_token(token, is_revoked=_is_token_revoked)
+        except InvalidToken as e:
+            return jsonify(valid=False, error=str(e)), 401
+        return jsonify(valid=True, claims=claims)
+
+    @app.post("/tokens/revoke")
+    def revoke_session_token():
+        """Revoga (logout) um token ainda válido."""
+        token = _token_from_request()
+        try:
+            claims = verify_token(token)
+        except InvalidToken as e:
+            return jsonify(error=str(e)), 401
         with get_conn() as conn:
             conn.execute(
-                "INSERT INTO login_events (user_id, success, created_at) VALUES (?, ?, ?)",
-                (user_id, int(success), _now()),
+                "INSERT OR IGNORE INTO revoked_tokens (jti, expires_at) VALUES (?, ?)",
+                (claims["jti"], claims["exp"]),
             )
+            # Revogações de tokens já expirados não servem mais para nada
+            conn.execute("DELETE FROM revoked_tokens WHERE expires_at <= ?", (int(time.time()),))
             conn.commit()
+        revocations.set(claims["jti"], True)
+        return jsonify(message="token revogado")
+
+    def _record_login_event(user_id: int | None, success: bool) -> None:
+        if user_id is None:
+            return
+        login_events.add(user_id, success)
 
     @app.get("/users/<int:user_id>")
     def get_user(user_id: int):
@@ -134,7 +444,9 @@ def create_app() -> Flask:
 
     @app.get("/users")
     def find_user_by_email():
-        """Busca usuário por email: /users?email=..."""
+        """Busca usuário por email (/users?email=...) ou vários por id (/users?ids=1,2,3)."""
+        if "ids" in request.args:
+            return find_users_by_ids()
         email = (request.args.get("email") or "").strip().lower()
         if not email:
             return jsonify(error="parâmetro 'email' é obrigatório"), 400
@@ -146,34 +458,109 @@ def create_app() -> Flask:
             return jsonify(error="usuário não encontrado"), 404
         return jsonify(user=_serialize_user(row))
 
+    def find_users_by_ids():
+        ids = _parse_id_list(request.args.get("ids", ""))
+        if ids is None:
+            return jsonify(error="parâmetro 'ids' deve ser uma lista de inteiros separados por vírgula"), 400
+        if len(ids) > MAX_BULK_IDS:
+            return jsonify(error=f"no máximo {MAX_BULK_IDS} ids por requisição"), 400
+        if not ids:
+            return jsonify(users=[])
+
+        placeholders = ",".join("?" for _ in ids)
+        with get_conn() as conn:
+            rows = conn.execute(
+                f"SELECT id, email, created_at FROM users WHERE id IN ({placeholders}) ORDER BY id ASC",
+                ids,
+            ).fetchall()
+        return jsonify(users=[_serialize_user(r) for r in rows])
+
     @app.get("/users/list")
     def list_users():
-        """Lista todos os usuários (apenas id, email, created_at)."""
+        """Lista usuários (id, email, created_at) em ordem de id.
+
+        - ?after_id=&limit= : paginação por cursor (keyset); devolve next_after_id
+        - ?format=ndjson    : stream de um JSON por linha, sem materializar a lista
+        - sem parâmetros    : lista completa (compatibilidade)
+        """
+        try:
+            after_id = int(request.args.get("after_id", 0))
+            limit = int(request.args["limit"]) if "limit" in request.args else None
+        except ValueError:
+            return jsonify(error="after_id e limit devem ser inteiros"), 400
+        if limit is not None:
+            limit = min(max(1, limit), MAX_PAGE_LIMIT)
+
+        wants_ndjson = request.args.get("format") == "ndjson" or (
+            request.accept_mimetypes.best == "application/x-ndjson"
+        )
+        if wants_ndjson:
+            def generate():
+                for row in iter_users(after_id, limit):
+                    yield json.dumps(_serialize_user(row)) + "\n"
+
+            return Response(generate(), mimetype="application/x-ndjson")
+
+        if limit is None and "after_id" not in request.args:
+            users = [_serialize_user(r) for r in iter_users()]
+            return jsonify(users=users)
+
+        users = [_serialize_user(r) for r in iter_users(after_id, limit)]
+        next_after_id = users[-1]["id"] if limit is not None and len(users) == limit else None
+        with get_conn() as conn:
+            total = conn.execute("SELECT users_total FROM auth_counters WHERE id = 1").fetchone()[0]
+        return jsonify(users=users, limit=limit, next_after_id=next_after_id, total=total)
+
+    @app.post("/login-events/rollup")
+    def run_login_events_rollup():
+        """Executa a compactação de login_events sob demanda."""
+        return jsonify(result=rollup_login_events(), retention_days=LOGIN_EVENTS_RETENTION_DAYS)
+
+    @app.get("/metrics/logins/daily")
+    def daily_login_metrics():
+        """Sucessos/falhas por dia: dias compactados vêm de login_events_daily e os dias
+        ainda dentro da janela de retenção são agregados dos eventos brutos."""
+        try:
+            days = min(max(1, int(request.args.get("days", 30))), 366)
+        except ValueError:
+            days = 30
+        since = (datetime.utcnow() - timedelta(days=days - 1)).date().isoformat()
+        login_events.flush()
         with get_conn() as conn:
             rows = conn.execute(
-                "SELECT id, email, created_at FROM users ORDER BY id ASC"
+                """
+                SELECT day, SUM(successes) AS successes, SUM(failures) AS failures
+                FROM (
+                    SELECT day, successes, failures FROM login_events_daily WHERE day >= ?
+                    UNION ALL
+                    SELECT substr(created_at, 1, 10), success = 1, success = 0
+                    FROM login_events WHERE created_at >= ?
+                )
+                GROUP BY day
+                ORDER BY day ASC
+                """,
+                (since, since),
             ).fetchall()
-        users = [_serialize_user(r) for r in rows]
-        return jsonify(users=users)
+        return jsonify(
+            days=[{"day": r["day"], "success": r["successes"], "failure": r["failures"]} for r in rows],
+            generated_at=_now(),
+        )
 
     @app.get("/metrics")
     def metrics():
+        login_events.flush()
         with get_conn() as conn:
-            total_users = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
-            login_totals = conn.execute(
-                """
-                SELECT
-                    SUM(CASE WHEN success = 1 THEN 1 ELSE 0 END) as success_count,
-                    SUM(CASE WHEN success = 0 THEN 1 ELSE 0 END) as failure_count
-                FROM login_events
-                """
+            counters = conn.execute(
+                "SELECT users_total, login_success, login_failure FROM auth_counters WHERE id = 1"
             ).fetchone()
 
-        success_count = login_totals["success_count"] or 0
-        failure_count = login_totals["failure_count"] or 0
+        total_users = counters["users_total"]
+        success_count = counters["login_success"]
+        failure_count = counters["login_failure"]
         return jsonify(
             users={"total": total_users},
             logins={"success": success_count, "failure": failure_count},
+            token_revocation_cache=revocations.stats(),
             generated_at=_now(),
         )
 
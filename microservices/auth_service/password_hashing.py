@@ -0,0 +1,75 @@
+"""Password hashing off the request thread.
+
+PBKDF2/scrypt are CPU bound and hold the GIL, so hashing runs in a bounded process pool.
+At most HASH_MAX_PENDING hashes may be queued; beyond that callers get ``HashingBusy``
+instead of piling up behind a login storm. HASH_WORKERS=0 hashes inline (useful for
+single-process setups and debugging).
+"""
+from concurrent.futures import ProcessPoolExecutor
+from threading import BoundedSemaphore, Lock
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+import os
+
+
+PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", "64"))
+HASH_QUEUE_TIMEOUT = float(os.getenv("HASH_QUEUE_TIMEOUT", "2"))
+HASH_TIMEOUT = float(os.getenv("HASH_TIMEOUT", "10"))
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = Lock()
+_slots = BoundedSemaphore(max(1, HASH_MAX_PENDING))
+_method_prefix: str | None = None
+
+
+class HashingBusy(Exception):
+    """Too many hashes already queued."""
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=HASH_WORKERS)
+    return _pool
+
+
+def _run(fn, *args):
+    if HASH_WORKERS <= 0:
+        return fn(*args)
+    if not _slots.acquire(timeout=HASH_QUEUE_TIMEOUT):
+        raise HashingBusy()
+    try:
+        future = _get_pool().submit(fn, *args)
+    except BaseException:
+        _slots.release()
+        raise
+    # O slot só volta quando o hash sai do pool (terminou ou foi cancelado), não quando o
+    # chamador desiste de esperar; assim a fila do pool nunca passa de HASH_MAX_PENDING
+    future.add_done_callback(lambda _: _slots.release())
+    try:
+        return future.result(timeout=HASH_TIMEOUT)
+    except TimeoutError:
+        future.cancel()
+        raise HashingBusy()
+
+
+def hash_password(password: str) -> str:
+    return _run(generate_password_hash, password, PASSWORD_HASH_METHOD)
+
+
+def verify_password(password_hash: str, password: str) -> bool:
+    return _run(check_password_hash, password_hash, password)
+
+
+def needs_rehash(password_hash: str) -> bool:
+    """True when the stored hash was made with other parameters than the configured ones."""
+    global _method_prefix
+    if _method_prefix is None:
+        # "scrypt" expands to "scrypt:32768:8:1" etc.; derive the full prefix once
+        _method_prefix = generate_password_hash("", PASSWORD_HASH_METHOD).split("$", 1)[0]
+    return password_hash.split("$", 1)[0] != _method_prefix
@@ -0,0 +1,114 @@
+"""Compact signed session tokens (HMAC-SHA256).
+
+Format: ``base64url(json payload) + "." + base64url(hmac)``. The payload carries ``sub``
+(user id), ``email``, ``iat``, ``exp`` and ``jti``. Only the standard library is used, so
+any service that shares AUTH_TOKEN_SECRET can copy this module and call
+``verify_token`` locally, without a network hop or a database read.
+"""
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Dict
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+
+
+AUTH_TOKEN_TTL = int(os.getenv("AUTH_TOKEN_TTL", "3600"))
+REVOCATION_CACHE_SIZE = int(os.getenv("REVOCATION_CACHE_SIZE", "10000"))
+REVOCATION_CACHE_TTL = float(os.getenv("REVOCATION_CACHE_TTL", "30"))
+
+_secret = os.getenv("AUTH_TOKEN_SECRET", "").encode()
+if not _secret:
+    # Um segredo aleatório por processo faria tokens de um worker falharem nos outros
+    raise RuntimeError("AUTH_TOKEN_SECRET não configurado")
+
+
+class InvalidToken(Exception):
+    """Malformed, tampered, expired or revoked token."""
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(body: str) -> str:
+    return _b64encode(hmac.new(_secret, body.encode(), hashlib.sha256).digest())
+
+
+def issue_token(user_id: int, email: str) -> Dict:
+    now = int(time.time())
+    payload = {"sub": user_id, "email": email, "iat": now, "exp": now + AUTH_TOKEN_TTL, "jti": secrets.token_hex(8)}
+    body = _b64encode(json.dumps(payload, separators=(",", ":")).encode())
+    return {"token": f"{body}.{_sign(body)}", "expires_at": payload["exp"], "jti": payload["jti"]}
+
+
+class RevocationCache:
+    """LRU of jti -> revoked, each answer kept for REVOCATION_CACHE_TTL seconds."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = max(1, maxsize)
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def is_revoked(self, jti: str, lookup: Callable[[str], bool]) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(jti)
+            if entry and now - entry[1] < self.ttl:
+                self._data.move_to_end(jti)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        revoked = lookup(jti)
+        self.set(jti, revoked)
+        return revoked
+
+    def set(self, jti: str, revoked: bool) -> None:
+        with self._lock:
+            self._data[jti] = (revoked, time.monotonic())
+            self._data.move_to_end(jti)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+revocations = RevocationCache(REVOCATION_CACHE_SIZE, REVOCATION_CACHE_TTL)
+
+
+def verify_token(token: str, is_revoked: Callable[[str], bool] | None = None) -> Dict:
+    """Return the token claims or raise InvalidToken.
+
+    ``is_revoked`` (optional) looks up a jti in the revocation store; answers are cached.
+    """
+    try:
+        body, signature = token.split(".")
+    except (AttributeError, ValueError):
+        raise InvalidToken("token malformado")
+    if not token.isascii():
+        raise InvalidToken("token malformado")
+    if not hmac.compare_digest(signature.encode(), _sign(body).encode()):
+        raise InvalidToken("assinatura inválida")
+    try:
+        claims = json.loads(_b64decode(body))
+    except ValueError:
+        raise InvalidToken("token malformado")
+    if claims.get("exp", 0) <= time.time():
+        raise InvalidToken("token expirado")
+    if is_revoked is not None and revocations.is_revoked(claims.get("jti", ""), is_revoked):
+        raise InvalidToken("token revogado")
+    return claims
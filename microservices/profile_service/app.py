@@ -1,17 +1,45 @@
-from datetime import datetime
+from collections import OrderedDict
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List
+from threading import Lock
+from typing import Dict, List, NamedTuple, Tuple
 
-from flask import Flask, jsonify, request
+from flask import Flask, current_app, jsonify, request
 from flask_cors import CORS
 
+import html
 import os
+import re
 import requests
 import sqlite3
 
+import bio_jobs
+import etag
+import http_client
+
 
 DATABASE_PATH = Path(__file__).with_name("profiles.db")
 ALLOWED_AVAILABILITY = {"actively-looking", "exploring"}
+SKILLS_SERVICE_BASE = "https://colaboradores-skills.azurewebsites.net"
+MAX_BULK_IDS = 500
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "10000"))
+COMPLETENESS_SECTIONS = ("full_name", "bio", "avatar_url", "links")
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+# Pesos do BM25 por coluna do índice (full_name, bio): acerto no nome vale mais
+SEARCH_NAME_WEIGHT = float(os.getenv("SEARCH_NAME_WEIGHT", "2.0"))
+SEARCH_BIO_WEIGHT = float(os.getenv("SEARCH_BIO_WEIGHT", "1.0"))
+# Marcadores (uso privado do Unicode) que o snippet() do FTS5 põe em volta dos acertos;
+# viram <mark> só depois de escapar o texto
+SNIPPET_OPEN, SNIPPET_CLOSE = "\ue000", "\ue001"
+
+# Seções preenchidas de um perfil; usado pelos triggers que mantêm profiles.completeness_score
+COMPLETENESS_SCORE_SQL = """
+    (COALESCE(full_name, '') <> '')
+    + (COALESCE(bio, '') <> '')
+    + (COALESCE(avatar_url, '') <> '')
+    + EXISTS (SELECT 1 FROM profile_links l WHERE l.user_id = profiles.user_id)
+"""
 
 
 def _now() -> str:
@@ -24,6 +52,15 @@ def get_conn() -> sqlite3.Connection:
     return conn
 
 
+bio_job_queue = bio_jobs.BioJobs(
+    get_conn,
+    bio_jobs.BIO_WORKERS,
+    bio_jobs.BIO_MAX_PENDING,
+    bio_jobs.BIO_JOB_TTL,
+    bio_jobs.BIO_JOB_STALE_AFTER,
+)
+
+
 def init_db():
     """Create storage for collaborator profiles."""
     with get_conn() as conn:
@@ -52,6 +89,136 @@ def init_db():
             )
             """
         )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_profile_links_user_id ON profile_links (user_id)"
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS bio_jobs (
+                job_id TEXT PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                result_json TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                finished_at REAL
+            )
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_bio_jobs_active ON bio_jobs (user_id) WHERE finished_at IS NULL"
+        )
+        # Bios geradas por IA, por fingerprint do conjunto de skills; valem BIO_SUGGESTION_TTL
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS bio_suggestions (
+                fingerprint TEXT PRIMARY KEY,
+                bio TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            )
+            """
+        )
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(profiles)")}
+        if "completeness_score" not in columns:
+            conn.execute(
+                "ALTER TABLE profiles ADD COLUMN completeness_score INTEGER NOT NULL DEFAULT 0"
+            )
+            # Perfis criados antes da coluna existir
+            conn.execute(f"UPDATE profiles SET completeness_score = {COMPLETENESS_SCORE_SQL}")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_profiles_completeness ON profiles (completeness_score)"
+        )
+        # Versão da linha, incrementada a cada mudança no perfil ou nos links (inclusive por
+        # outros processos ou scripts); o cache de documentos confere contra ela
+        if "version" not in columns:
+            conn.execute("ALTER TABLE profiles ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        conn.executescript(
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_profiles_version_update
+            AFTER UPDATE ON profiles
+            WHEN NEW.version = OLD.version
+            BEGIN
+                UPDATE profiles SET version = OLD.version + 1 WHERE user_id = NEW.user_id;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_profile_links_version_insert
+            AFTER INSERT ON profile_links
+            BEGIN
+                UPDATE profiles SET version = version + 1 WHERE user_id = NEW.user_id;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_profile_links_version_delete
+            AFTER DELETE ON profile_links
+            BEGIN
+                UPDATE profiles SET version = version + 1 WHERE user_id = OLD.user_id;
+            END;
+            """
+        )
+        # Índice de busca textual (external content: o texto fica só em profiles)
+        fts_exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'profiles_fts'"
+        ).fetchone()
+        conn.executescript(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS profiles_fts USING fts5(
+                full_name, bio,
+                content='profiles', content_rowid='user_id',
+                tokenize='unicode61 remove_diacritics 2'
+            );
+
+            CREATE TRIGGER IF NOT EXISTS trg_profiles_fts_insert
+            AFTER INSERT ON profiles
+            BEGIN
+                INSERT INTO profiles_fts (rowid, full_name, bio) VALUES (NEW.user_id, NEW.full_name, NEW.bio);
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_profiles_fts_update
+            AFTER UPDATE OF full_name, bio ON profiles
+            BEGIN
+                INSERT INTO profiles_fts (profiles_fts, rowid, full_name, bio)
+                VALUES ('delete', OLD.user_id, OLD.full_name, OLD.bio);
+                INSERT INTO profiles_fts (rowid, full_name, bio) VALUES (NEW.user_id, NEW.full_name, NEW.bio);
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_profiles_fts_delete
+            AFTER DELETE ON profiles
+            BEGIN
+                INSERT INTO profiles_fts (profiles_fts, rowid, full_name, bio)
+                VALUES ('delete', OLD.user_id, OLD.full_name, OLD.bio);
+            END;
+            """
+        )
+        if not fts_exists:
+            # Perfis criados antes do índice existir
+            conn.execute("INSERT INTO profiles_fts (profiles_fts) VALUES ('rebuild')")
+        refresh_sql = f"UPDATE profiles SET completeness_score = {COMPLETENESS_SCORE_SQL} WHERE user_id = {{user_id}};"
+        conn.executescript(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_profiles_completeness_insert
+            AFTER INSERT ON profiles
+            BEGIN
+                {refresh_sql.format(user_id="NEW.user_id")}
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_profiles_completeness_update
+            AFTER UPDATE OF full_name, bio, avatar_url ON profiles
+            BEGIN
+                {refresh_sql.format(user_id="NEW.user_id")}
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_profile_links_completeness_insert
+            AFTER INSERT ON profile_links
+            BEGIN
+                {refresh_sql.format(user_id="NEW.user_id")}
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_profile_links_completeness_delete
+            AFTER DELETE ON profile_links
+            BEGIN
+                {refresh_sql.format(user_id="OLD.user_id")}
+            END;
+            """
+        )
         conn.commit()
 
 
@@ -69,28 +236,221 @@ def _serialize_profile(row: sqlite3.Row, links: List[sqlite3.Row]) -> Dict:
         {"id": link["id"], "label": link["label"], "url": link["url"], "created_at": link["created_at"]}
         for link in links
     ]
-    data["completeness"] = calculate_completeness(row, data["links"])
+    data["completeness"] = calculate_completeness(row)
     return data
 
 
-def calculate_completeness(profile_row: sqlite3.Row, links: List[Dict]) -> Dict:
-    """Very lightweight scoring to communicate MVP value delivered."""
-    sections = [
-        ("full_name", bool(profile_row["full_name"])),
-        ("bio", bool(profile_row["bio"])),
-        ("avatar_url", bool(profile_row["avatar_url"])),
-        ("links", len(links) > 0),
-    ]
-    score = sum(1 for _, filled in sections if filled)
-    total = len(sections)
-    percentage = int((score / total) * 100)
-    return {"score": score, "total": total, "percentage": percentage}
+class ProfileDocument(NamedTuple):
+    body: str
+    etag: str
+    row_version: str  # profiles.version + updated_at quando o documento foi montado
+
+
+class ProfileDocumentCache:
+    """Bounded LRU of ready-to-send profile documents (serialized JSON), keyed by user id.
+
+    Writes in this process update entries directly; a hit is still checked against the
+    row version (see ``_profile_row_version``) so writes from other workers or scripts
+    are picked up.
+
+    Every write bumps ``version``. A reader only fills the cache if no write happened
+    since it started reading, so a slow reader never stores an older document over a
+    newer one.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = max(1, maxsize)
+        self.version = 0
+        self._data: "OrderedDict[int, ProfileDocument]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int) -> ProfileDocument | None:
+        with self._lock:
+            document = self._data.get(user_id)
+            if document is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(user_id)
+            self.hits += 1
+            return document
+
+    def current_version(self) -> int:
+        with self._lock:
+            return self.version
+
+    def _store(self, user_id: int, document: ProfileDocument) -> None:
+        self._data[user_id] = document
+        self._data.move_to_end(user_id)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def fill(self, user_id: int, document: ProfileDocument, version: int) -> None:
+        """Populate after a read that started at ``version``."""
+        with self._lock:
+            if self.version == version:
+                self._store(user_id, document)
+
+    def write(self, user_id: int, document: ProfileDocument | None, version: int) -> None:
+        """Write-through after a commit. ``version`` must be read inside the write
+        transaction; if another write got in first the entry is dropped instead."""
+        with self._lock:
+            stale = self.version != version
+            self.version += 1
+            if document is None or stale:
+                self._data.pop(user_id, None)
+            else:
+                self._store(user_id, document)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+profile_cache = ProfileDocumentCache(PROFILE_CACHE_SIZE)
+
+
+def _load_profile_document(conn: sqlite3.Connection, user_id: int) -> ProfileDocument | None:
+    """Read and serialize ``{"profile": ...}`` for user_id; None when it does not exist."""
+    profile = conn.execute("SELECT * FROM profiles WHERE user_id = ?", (user_id,)).fetchone()
+    if not profile:
+        return None
+    links = conn.execute(
+        "SELECT * FROM profile_links WHERE user_id = ? ORDER BY created_at DESC", (user_id,)
+    ).fetchall()
+    body = current_app.json.dumps({"profile": _serialize_profile(profile, links)}) + "\n"
+    return ProfileDocument(body, etag.make_etag(body.encode()), _row_version(profile))
+
+
+def _row_version(row: sqlite3.Row) -> str:
+    return f"{row['version']}:{row['updated_at']}"
+
+
+def _profile_row_version(conn: sqlite3.Connection, user_id: int) -> str | None:
+    row = conn.execute("SELECT version, updated_at FROM profiles WHERE user_id = ?", (user_id,)).fetchone()
+    return _row_version(row) if row else None
+
+
+def _document_response(document: ProfileDocument):
+    response = current_app.response_class(document.body, mimetype=current_app.json.mimetype)
+    response.set_etag(document.etag)
+    return response
+
+
+def _fts_query(text: str) -> str | None:
+    """Transforma o texto digitado em uma consulta FTS5 segura: cada palavra vira um
+    prefixo entre aspas ("ana"* AND "pyth"*), sem expor a sintaxe do FTS5 ao usuário."""
+    terms = re.findall(r"\w+", text)
+    if not terms:
+        return None
+    return " AND ".join(f'"{term}"*' for term in terms)
+
+
+def _parse_search_cursor(raw: str) -> Tuple[float, int] | None:
+    """Cursor "score:user_id" devolvido em next_cursor."""
+    try:
+        score, user_id = raw.rsplit(":", 1)
+        return float(score), int(user_id)
+    except ValueError:
+        return None
+
+
+def _highlight_snippet(text: str | None) -> str | None:
+    """Trecho do snippet() em HTML seguro: nome e bio são texto do usuário, então tudo é
+    escapado e só os marcadores de acerto viram <mark>."""
+    if text is None:
+        return None
+    return html.escape(text).replace(SNIPPET_OPEN, "<mark>").replace(SNIPPET_CLOSE, "</mark>")
+
+
+def _generate_bio(user_id: int) -> Dict:
+    """Corpo do job de bio: busca skills, reaproveita a bio de um conjunto de skills
+    idêntico gerada há menos de BIO_SUGGESTION_TTL e só chama a IA em caso de miss.
+
+    Só bios geradas com sucesso a partir das skills reais entram no cache: falha ao
+    buscar as skills ou resposta vazia da IA falham o job sem gravar nada.
+    """
+    try:
+        skills_res = http_client.get(f"{SKILLS_SERVICE_BASE}/users/{user_id}/skills", timeout=8)
+        skills_res.raise_for_status()
+        skills = (skills_res.json() or {}).get("skills", [])
+    except (requests.exceptions.RequestException, ValueError):
+        raise bio_jobs.BioBackendError("Falha ao buscar skills")
+
+    fingerprint = bio_jobs.skills_fingerprint(skills)
+    # created_at é ISO em UTC: a comparação de strings respeita a ordem no tempo
+    fresh_after = datetime.utcnow() - timedelta(seconds=bio_jobs.BIO_SUGGESTION_TTL)
+    fresh_after = fresh_after.isoformat(timespec="seconds")
+    with get_conn() as conn:
+        cached = conn.execute(
+            "SELECT bio FROM bio_suggestions WHERE fingerprint = ? AND created_at >= ?",
+            (fingerprint, fresh_after),
+        ).fetchone()
+    if cached:
+        return {"bio_suggestion": cached["bio"], "cached": True}
+
+    backend = bio_jobs.get_backend()
+    if backend is None:
+        raise bio_jobs.BioBackendError("IA indisponível")
+    bio = (backend.generate(bio_jobs.build_prompt(skills)) or "").strip()
+    if not bio:
+        raise bio_jobs.BioBackendError("Resposta vazia da IA")
+    with get_conn() as conn:
+        conn.execute("DELETE FROM bio_suggestions WHERE created_at < ?", (fresh_after,))
+        conn.execute(
+            "INSERT OR REPLACE INTO bio_suggestions (fingerprint, bio, created_at) VALUES (?, ?, ?)",
+            (fingerprint, bio, _now()),
+        )
+        conn.commit()
+    return {"bio_suggestion": bio, "cached": False}
+
+
+def _serialize_bio_job(job: Dict) -> Dict:
+    data = {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "status_url": f"/profiles/{job['user_id']}/bio/jobs/{job['job_id']}",
+    }
+    if job["status"] == "done":
+        data.update(job["result"])
+    elif job["status"] == "failed":
+        data["error"] = job["error"]
+    return data
+
+
+def _parse_id_list(raw: str) -> List[int] | None:
+    """Parse a comma separated id list ("1,2,3"); returns None when malformed."""
+    ids: List[int] = []
+    for part in raw.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if not part.isdigit():
+            return None
+        ids.append(int(part))
+    return list(dict.fromkeys(ids))
+
+
+def _completeness_percentage(score: int) -> int:
+    return int((score / len(COMPLETENESS_SECTIONS)) * 100)
+
+
+def calculate_completeness(profile_row: sqlite3.Row) -> Dict:
+    """Very lightweight scoring to communicate MVP value delivered.
+
+    The score (one point per filled section) is kept up to date by triggers in
+    ``profiles.completeness_score``; this only formats it.
+    """
+    score = profile_row["completeness_score"]
+    return {"score": score, "total": len(COMPLETENESS_SECTIONS), "percentage": _completeness_percentage(score)}
 
 
 def create_app() -> Flask:
     init_db()
     app = Flask(__name__)
     CORS(app)
+    etag.init_app(app)
 
     @app.get("/health")
     def health():
@@ -131,24 +491,137 @@ def create_app() -> Flask:
                     """,
                     (user_id, full_name, bio, avatar_url, availability, timestamp, timestamp),
                 )
+            version = profile_cache.current_version()
+            document = _load_profile_document(conn, user_id)
             conn.commit()
+        profile_cache.write(user_id, document, version)
+
+        return _document_response(document)
+
+    @app.get("/profiles")
+    def list_profiles_by_user_ids():
+        """Busca vários perfis de uma vez: /profiles?user_ids=1,2,3 (um único JOIN)."""
+        user_ids = _parse_id_list(request.args.get("user_ids", ""))
+        if user_ids is None:
+            return jsonify(error="user_ids deve ser uma lista de inteiros separados por vírgula"), 400
+        if len(user_ids) > MAX_BULK_IDS:
+            return jsonify(error=f"no máximo {MAX_BULK_IDS} user_ids por requisição"), 400
+        if not user_ids:
+            return jsonify(profiles=[])
+
+        placeholders = ",".join("?" for _ in user_ids)
+        with get_conn() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT p.*, l.id AS link_id, l.label AS link_label, l.url AS link_url,
+                       l.created_at AS link_created_at
+                FROM profiles p
+                LEFT JOIN profile_links l ON l.user_id = p.user_id
+                WHERE p.user_id IN ({placeholders})
+                ORDER BY p.user_id ASC, l.created_at DESC
+                """,
+                user_ids,
+            ).fetchall()
+
+        grouped: Dict[int, tuple] = {}
+        for row in rows:
+            profile_row, links = grouped.setdefault(row["user_id"], (row, []))
+            if row["link_id"] is not None:
+                links.append(
+                    {
+                        "id": row["link_id"],
+                        "label": row["link_label"],
+                        "url": row["link_url"],
+                        "created_at": row["link_created_at"],
+                    }
+                )
 
-        return get_profile(user_id)
+        profiles = [_serialize_profile(row, links) for row, links in grouped.values()]
+        return jsonify(profiles=profiles)
+
+    @app.get("/profiles/search")
+    def search_profiles():
+        """Busca textual em full_name e bio: /profiles/search?q=&availability=&limit=&cursor=
+
+        Resultados ordenados por relevância (BM25); ``next_cursor`` pagina por keyset
+        (score, user_id) em vez de OFFSET.
+        """
+        query = _fts_query(request.args.get("q", ""))
+        if query is None:
+            return jsonify(error="q é obrigatório"), 400
+        availability = (request.args.get("availability") or "").strip() or None
+        if availability is not None and availability not in ALLOWED_AVAILABILITY:
+            return jsonify(error="availability deve ser 'actively-looking' ou 'exploring'"), 400
+        try:
+            limit = min(max(1, int(request.args.get("limit", SEARCH_DEFAULT_LIMIT))), SEARCH_MAX_LIMIT)
+        except ValueError:
+            return jsonify(error="limit deve ser um inteiro"), 400
+        cursor = None
+        if request.args.get("cursor"):
+            cursor = _parse_search_cursor(request.args["cursor"])
+            if cursor is None:
+                return jsonify(error="cursor inválido"), 400
+
+        score_sql = f"bm25(profiles_fts, {SEARCH_NAME_WEIGHT}, {SEARCH_BIO_WEIGHT})"
+        conditions = ["profiles_fts MATCH ?"]
+        params: List = [SNIPPET_OPEN, SNIPPET_CLOSE, query]
+        if availability:
+            conditions.append("p.availability = ?")
+            params.append(availability)
+        if cursor:
+            conditions.append(f"({score_sql} > ? OR ({score_sql} = ? AND p.user_id > ?))")
+            params.extend([cursor[0], cursor[0], cursor[1]])
+        params.append(limit + 1)
+
+        with get_conn() as conn:
+            try:
+                rows = conn.execute(
+                    f"""
+                    SELECT p.user_id, p.full_name, p.avatar_url, p.availability,
+                           {score_sql} AS score,
+                           snippet(profiles_fts, -1, ?, ?, '…', 16) AS snippet
+                    FROM profiles_fts
+                    JOIN profiles p ON p.user_id = profiles_fts.rowid
+                    WHERE {" AND ".join(conditions)}
+                    ORDER BY score ASC, p.user_id ASC
+                    LIMIT ?
+                    """,
+                    params,
+                ).fetchall()
+            except sqlite3.OperationalError:
+                return jsonify(error="consulta inválida"), 400
+
+        page = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            last = page[-1]
+            next_cursor = f"{last['score']!r}:{last['user_id']}"
+        results = [
+            {
+                "user_id": row["user_id"],
+                "full_name": row["full_name"],
+                "avatar_url": row["avatar_url"],
+                "availability": row["availability"],
+                "score": -row["score"],
+                "snippet": _highlight_snippet(row["snippet"]),
+            }
+            for row in page
+        ]
+        return jsonify(results=results, next_cursor=next_cursor)
 
     @app.get("/profiles/<int:user_id>")
     def get_profile(user_id: int):
+        document = profile_cache.get(user_id)
         with get_conn() as conn:
-            profile = conn.execute(
-                "SELECT * FROM profiles WHERE user_id = ?", (user_id,)
-            ).fetchone()
-            if not profile:
-                return jsonify(error="perfil não encontrado"), 404
-            links = conn.execute(
-                "SELECT * FROM profile_links WHERE user_id = ? ORDER BY created_at DESC", (user_id,)
-            ).fetchall()
-
-        data = _serialize_profile(profile, links)
-        return jsonify(profile=data)
+            if document is not None and _profile_row_version(conn, user_id) != document.row_version:
+                document = None  # alterado fora deste processo
+            if document is None:
+                version = profile_cache.current_version()
+                document = _load_profile_document(conn, user_id)
+                if document is None:
+                    return jsonify(error="perfil não encontrado"), 404
+                profile_cache.fill(user_id, document, version)
+        return etag.not_modified(document.etag) or _document_response(document)
 
     @app.post("/profiles/<int:user_id>/links")
     def add_link(user_id: int):
@@ -172,9 +645,12 @@ def create_app() -> Flask:
                 """,
                 (user_id, label, url, _now()),
             )
+            version = profile_cache.current_version()
+            document = _load_profile_document(conn, user_id)
             conn.commit()
+        profile_cache.write(user_id, document, version)
 
-        return get_profile(user_id)
+        return _document_response(document)
 
     @app.delete("/profiles/<int:user_id>/links/<int:link_id>")
     def remove_link(user_id: int, link_id: int):
@@ -184,22 +660,55 @@ def create_app() -> Flask:
             )
             if deleted.rowcount == 0:
                 return jsonify(error="link não encontrado"), 404
+            version = profile_cache.current_version()
+            document = _load_profile_document(conn, user_id)
             conn.commit()
+        profile_cache.write(user_id, document, version)
         return jsonify(message="link removido", profile_url=f"/profiles/{user_id}")
 
     @app.get("/profiles/<int:user_id>/completeness")
     def profile_completeness(user_id: int):
         with get_conn() as conn:
             profile = conn.execute(
-                "SELECT * FROM profiles WHERE user_id = ?", (user_id,)
+                "SELECT completeness_score FROM profiles WHERE user_id = ?", (user_id,)
             ).fetchone()
-            if not profile:
-                return jsonify(error="perfil não encontrado"), 404
-            links = conn.execute(
-                "SELECT * FROM profile_links WHERE user_id = ?", (user_id,)
+        if not profile:
+            return jsonify(error="perfil não encontrado"), 404
+
+        return jsonify(completeness=calculate_completeness(profile))
+
+    @app.get("/profiles/completeness/distribution")
+    def completeness_distribution():
+        """Quantos perfis há em cada nível de completude (lido só do índice).
+
+        ``?below=50`` também devolve quantos perfis estão abaixo desse percentual.
+        """
+        below = request.args.get("below")
+        if below is not None and not below.isdigit():
+            return jsonify(error="below deve ser um percentual inteiro"), 400
+
+        with get_conn() as conn:
+            rows = conn.execute(
+                """
+                SELECT completeness_score, COUNT(*) AS total
+                FROM profiles INDEXED BY idx_profiles_completeness
+                GROUP BY completeness_score
+                ORDER BY completeness_score ASC
+                """
             ).fetchall()
 
-        return jsonify(completeness=calculate_completeness(profile, links))
+        counts = {row["completeness_score"]: row["total"] for row in rows}
+        buckets = [
+            {"score": score, "percentage": _completeness_percentage(score), "profiles": counts.get(score, 0)}
+            for score in range(len(COMPLETENESS_SECTIONS) + 1)
+        ]
+        data = {"buckets": buckets, "total_profiles": sum(counts.values()), "generated_at": _now()}
+        if below is not None:
+            data["below"] = {
+                "percentage": int(below),
+                "profiles": sum(b["profiles"] for b in buckets if b["percentage"] < int(below)),
+            }
+        return jsonify(data)
 
     @app.get("/metrics")
     def metrics():
@@ -228,79 +737,31 @@ def create_app() -> Flask:
         return jsonify(
             profiles={"total": total_profiles, "availability": availability},
             links={"average_per_profile": average_links},
+            profile_cache=profile_cache.stats(),
+            bio_jobs=bio_job_queue.stats(),
             generated_at=_now(),
         )
 
     @app.post("/profiles/<int:user_id>/bio/suggest")
     def suggest_bio(user_id: int):
-        """Gera uma bio curta com IA (GROQ) com base nas skills do usuário."""
-        api_key = os.getenv("GROQ_API") or os.getenv("GROQ_API_KEY")
-        if not api_key:
-            return jsonify(error="IA indisponível: configure a variável de ambiente GROQ_API"), 400
-
-        # Buscar skills do usuário
-        try:
-            skills_res = requests.get(
-                f"https://colaboradores-skills.azurewebsites.net/users/{user_id}/skills",
-                timeout=8,
-            )
-            skills = (skills_res.json() or {}).get("skills", []) if skills_res.ok else []
-        except requests.exceptions.RequestException:
-            skills = []
-
-        skill_lines = [
-            f"- {s.get('skill_name','')} ({s.get('proficiency','')})" for s in skills
-        ] or ["- Sem skills cadastradas"]
-        skills_text = "\n".join(skill_lines)
-
-        prompt = (
-            "Gere uma bio curta e objetiva em português (50 a 70 palavras), "
-            "focada em impacto e colaboração, com base nas competências abaixo. "
-            "Evite listas e emoji. Texto corrido.\n\n"
-            f"Competências:\n{skills_text}\n\nFormato: texto puro."
-        )
+        """Enfileira a geração de uma bio com IA com base nas skills do usuário.
 
+        Responde 202 na hora com o job; o resultado sai em GET .../bio/jobs/<job_id>.
+        """
+        if bio_jobs.get_backend() is None:
+            return jsonify(error="IA indisponível: configure a variável de ambiente GROQ_API"), 400
         try:
-            groq_res = requests.post(
-                "https://api.groq.com/openai/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {api_key}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model": "llama-3.3-70b-versatile",
-                    "messages": [
-                        {
-                            "role": "system",
-                            "content": "Você é um assistente que escreve bios curtas em pt-BR, com clareza e profissionalismo.",
-                        },
-                        {"role": "user", "content": prompt},
-                    ],
-                    "temperature": 0.6,
-                    "max_tokens": 256,
-                },
-                timeout=20,
-            )
-            if not groq_res.ok:
-                # Log detalhado no servidor para debug, mas resposta genérica para o cliente
-                try:
-                    print("[GROQ_ERROR_STATUS]", groq_res.status_code)
-                    print("[GROQ_ERROR_BODY]", groq_res.text[:500])
-                except Exception:
-                    pass
-                return jsonify(error="Falha ao gerar bio"), 502
-            data = groq_res.json()
-            content = (
-                ((data or {}).get("choices") or [{}])[0]
-                .get("message", {})
-                .get("content", "")
-                .strip()
-            )
-            if not content:
-                return jsonify(error="Resposta vazia da IA"), 502
-            return jsonify(bio_suggestion=content)
-        except requests.exceptions.RequestException:
-            return jsonify(error="Erro de conexão com a IA"), 502
+            job = bio_job_queue.submit(user_id, lambda: _generate_bio(user_id))
+        except bio_jobs.BioQueueFull:
+            return jsonify(error="Muitas bios sendo geradas agora, tente novamente em instantes"), 503, {"Retry-After": "5"}
+        return jsonify(_serialize_bio_job(job)), 202
+
+    @app.get("/profiles/<int:user_id>/bio/jobs/<job_id>")
+    def bio_job_status(user_id: int, job_id: str):
+        job = bio_job_queue.get(job_id)
+        if not job or job["user_id"] != user_id:
+            return jsonify(error="job não encontrado"), 404
+        return jsonify(_serialize_bio_job(job))
 
     return app
 
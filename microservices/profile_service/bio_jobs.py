@@ -0,0 +1,261 @@
+"""Geração de bio com IA fora da thread da requisição.
+
+``POST /profiles/<id>/bio/suggest`` só enfileira um job; um pool limitado (BIO_WORKERS)
+busca as skills e chama o backend de IA. Com BIO_MAX_PENDING jobs na fila ou rodando,
+novos pedidos recebem ``BioQueueFull`` em vez de se acumularem.
+
+Os jobs ficam na tabela bio_jobs, então o status pode ser consultado em qualquer worker.
+
+O backend é plugável: BIO_BACKEND=groq (padrão, precisa de GROQ_API) ou BIO_BACKEND=stub,
+que gera um texto local determinístico, útil em testes e desenvolvimento.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+import hashlib
+import json
+import os
+import requests
+import secrets
+import sqlite3
+import time
+
+import http_client
+
+
+BIO_BACKEND = os.getenv("BIO_BACKEND", "groq")
+BIO_WORKERS = int(os.getenv("BIO_WORKERS", "2"))
+BIO_MAX_PENDING = int(os.getenv("BIO_MAX_PENDING", "16"))
+BIO_JOB_TTL = float(os.getenv("BIO_JOB_TTL", "600"))  # segundos que um job terminado fica consultável
+BIO_JOB_STALE_AFTER = float(os.getenv("BIO_JOB_STALE_AFTER", "300"))  # job ativo há mais tempo que isso foi perdido
+BIO_SUGGESTION_TTL = float(os.getenv("BIO_SUGGESTION_TTL", "86400"))  # segundos que uma bio fica reaproveitável
+STALE_JOB_ERROR = "Geração interrompida, tente novamente"
+GROQ_URL = "https://api.groq.com/openai/v1/chat/completions"
+GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+GROQ_TIMEOUT = float(os.getenv("GROQ_TIMEOUT", "20"))
+
+
+class BioBackendError(Exception):
+    """Falha ao gerar o texto; a mensagem é segura para devolver ao cliente."""
+
+
+class BioQueueFull(Exception):
+    """Jobs demais aguardando ou em execução."""
+
+
+def skills_fingerprint(skills: List[Dict]) -> str:
+    """Hash das skills ordenadas (nome normalizado, proficiência): mesmas skills, mesmo prompt."""
+    pairs = sorted(
+        {((s.get("skill_name") or "").strip().lower(), (s.get("proficiency") or "").strip().lower()) for s in skills}
+    )
+    return hashlib.sha256(json.dumps(pairs, ensure_ascii=False).encode()).hexdigest()
+
+
+def build_prompt(skills: List[Dict]) -> str:
+    skill_lines = [
+        f"- {s.get('skill_name','')} ({s.get('proficiency','')})"
+        for s in sorted(skills, key=lambda s: ((s.get("skill_name") or "").lower(), s.get("proficiency") or ""))
+    ] or ["- Sem skills cadastradas"]
+    skills_text = "\n".join(skill_lines)
+    return (
+        "Gere uma bio curta e objetiva em português (50 a 70 palavras), "
+        "focada em impacto e colaboração, com base nas competências abaixo. "
+        "Evite listas e emoji. Texto corrido.\n\n"
+        f"Competências:\n{skills_text}\n\nFormato: texto puro."
+    )
+
+
+class GroqBackend:
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+
+    def generate(self, prompt: str) -> str:
+        try:
+            groq_res = http_client.post(
+                GROQ_URL,
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json",
+                },
+                json={
+                    "model": GROQ_MODEL,
+                    "messages": [
+                        {
+                            "role": "system",
+                            "content": "Você é um assistente que escreve bios curtas em pt-BR, com clareza e profissionalismo.",
+                        },
+                        {"role": "user", "content": prompt},
+                    ],
+                    "temperature": 0.6,
+                    "max_tokens": 256,
+                },
+                timeout=GROQ_TIMEOUT,
+            )
+        except requests.exceptions.RequestException:
+            raise BioBackendError("Erro de conexão com a IA")
+        if not groq_res.ok:
+            # Log detalhado no servidor para debug, mas resposta genérica para o cliente
+            print("[GROQ_ERROR_STATUS]", groq_res.status_code)
+            print("[GROQ_ERROR_BODY]", groq_res.text[:500])
+            raise BioBackendError("Falha ao gerar bio")
+        try:
+            data = groq_res.json()
+        except ValueError:
+            raise BioBackendError("Falha ao gerar bio")
+        content = (
+            ((data or {}).get("choices") or [{}])[0]
+            .get("message", {})
+            .get("content", "")
+            .strip()
+        )
+        if not content:
+            raise BioBackendError("Resposta vazia da IA")
+        return content
+
+
+class StubBackend:
+    """Backend local sem rede: monta a bio a partir das competências do prompt."""
+
+    def generate(self, prompt: str) -> str:
+        skills = [line[2:].split(" (")[0] for line in prompt.splitlines() if line.startswith("- ")]
+        return "Profissional colaborativo com experiência em " + ", ".join(skills) + "."
+
+
+_backend = None
+
+
+def get_backend():
+    """Backend configurado, ou None quando a IA não está disponível."""
+    if _backend is not None:
+        return _backend
+    if BIO_BACKEND == "stub":
+        return StubBackend()
+    api_key = os.getenv("GROQ_API") or os.getenv("GROQ_API_KEY")
+    return GroqBackend(api_key) if api_key else None
+
+
+def set_backend(backend) -> None:
+    """Substitui o backend (ex.: um stub em testes); None volta ao configurado."""
+    global _backend
+    _backend = backend
+
+
+class BioJobs:
+    """Jobs de bio gravados na tabela bio_jobs, para que qualquer worker responda o status.
+
+    A execução fica no pool de threads do processo que aceitou o job. Jobs que passam de
+    ``stale_after`` segundos sem terminar (o processo morreu no meio) viram "failed".
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], sqlite3.Connection],
+        workers: int,
+        max_pending: int,
+        job_ttl: float,
+        stale_after: float,
+    ):
+        self._connect = connect
+        self.max_pending = max(1, max_pending)
+        self.job_ttl = job_ttl
+        self.stale_after = stale_after
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="bio-job")
+
+    def submit(self, user_id: int, fn: Callable[[], Dict]) -> Dict:
+        """Enfileira ``fn`` para o usuário; se ele já tem um job ativo, devolve esse."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            # IMMEDIATE: a checagem de fila cheia/job ativo e o INSERT valem entre processos
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "DELETE FROM bio_jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+                (now - self.job_ttl,),
+            )
+            conn.execute(
+                """
+                UPDATE bio_jobs SET status = 'failed', error = ?, finished_at = ?
+                WHERE finished_at IS NULL AND created_at < ?
+                """,
+                (STALE_JOB_ERROR, now, now - self.stale_after),
+            )
+            active = conn.execute(
+                "SELECT * FROM bio_jobs WHERE user_id = ? AND finished_at IS NULL", (user_id,)
+            ).fetchone()
+            if active:
+                conn.commit()
+                return _serialize_job(active)
+            pending = conn.execute("SELECT COUNT(*) FROM bio_jobs WHERE finished_at IS NULL").fetchone()[0]
+            if pending >= self.max_pending:
+                conn.rollback()
+                raise BioQueueFull()
+            job_id = secrets.token_hex(8)
+            conn.execute(
+                "INSERT INTO bio_jobs (job_id, user_id, status, created_at) VALUES (?, ?, 'queued', ?)",
+                (job_id, user_id, now),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        self._executor.submit(self._run, job_id, fn)
+        return self.get(job_id)
+
+    def _run(self, job_id: str, fn: Callable[[], Dict]) -> None:
+        self._update(job_id, "running")
+        try:
+            self._update(job_id, "done", result=fn())
+        except BioBackendError as e:
+            self._update(job_id, "failed", error=str(e))
+        except Exception as e:
+            print("[BIO_JOB_ERROR]", job_id, e)
+            self._update(job_id, "failed", error="Falha ao gerar bio")
+
+    def _update(self, job_id: str, status: str, result: Dict | None = None, error: str | None = None) -> None:
+        finished_at = time.time() if status in ("done", "failed") else None
+        conn = self._connect()
+        try:
+            conn.execute(
+                """
+                UPDATE bio_jobs SET status = ?, result_json = ?, error = ?, finished_at = ?
+                WHERE job_id = ?
+                """,
+                (status, json.dumps(result) if result is not None else None, error, finished_at, job_id),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get(self, job_id: str) -> Dict | None:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM bio_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        if not row:
+            return None
+        job = _serialize_job(row)
+        if job["finished_at"] is None and time.time() - job["created_at"] > self.stale_after:
+            job.update(status="failed", error=STALE_JOB_ERROR)
+        return job
+
+    def stats(self) -> Dict[str, int]:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT COUNT(*) AS tracked, COUNT(*) FILTER (WHERE finished_at IS NULL) AS active FROM bio_jobs"
+            ).fetchone()
+        finally:
+            conn.close()
+        return {"active": row["active"], "tracked": row["tracked"], "max_pending": self.max_pending}
+
+
+def _serialize_job(row: sqlite3.Row) -> Dict:
+    return {
+        "job_id": row["job_id"],
+        "user_id": row["user_id"],
+        "status": row["status"],
+        "result": json.loads(row["result_json"]) if row["result_json"] else None,
+        "error": row["error"],
+        "created_at": row["created_at"],
+        "finished_at": row["finished_at"],
+    }
@@ -0,0 +1,62 @@
+"""ETag / If-None-Match para GETs.
+
+``init_app(app)`` registra um ``after_request`` que dá a toda resposta 200 de GET/HEAD um
+ETag forte e responde ``304 Not Modified`` (sem corpo) quando o cliente já tem essa versão.
+Sem nada declarado pela rota, o ETag é um hash do corpo. Rotas que conhecem uma versão
+barata do recurso (updated_at, contagem/maior id das linhas...) chamam ``not_modified``
+antes de montar a resposta: com o ETag batendo, o 304 sai sem consultar nem serializar o
+corpo.
+
+Este arquivo é copiado igual em cada serviço (cada um é implantado a partir do próprio
+diretório).
+"""
+from flask import Flask, Response, current_app, g, request
+
+import hashlib
+
+
+def make_etag(*parts) -> str:
+    """ETag a partir de bytes (corpo) ou de qualquer combinação de valores (versão)."""
+    if len(parts) == 1 and isinstance(parts[0], bytes):
+        raw = parts[0]
+    else:
+        raw = "\x1f".join(str(part) for part in parts).encode()
+    return hashlib.sha256(raw).hexdigest()[:32]
+
+
+def _not_modified_response(etag: str) -> Response:
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    return response
+
+
+def not_modified(etag: str) -> Response | None:
+    """Declara o ETag do recurso da requisição atual; devolve a resposta 304 quando o
+    If-None-Match do cliente já tem essa versão, senão None."""
+    g.etag = etag
+    if request.if_none_match.contains_weak(etag):
+        return _not_modified_response(etag)
+    return None
+
+
+def _apply_etag(response: Response) -> Response:
+    if request.method not in ("GET", "HEAD") or response.status_code != 200:
+        return response
+    if response.is_streamed or response.direct_passthrough:
+        return response
+
+    etag = g.get("etag")
+    if etag is None:
+        etag, _ = response.get_etag()
+    if etag is None:
+        etag = make_etag(response.get_data())
+    response.set_etag(etag)
+    if request.if_none_match.contains_weak(etag):
+        return _not_modified_response(etag)
+    return response
+
+
+def init_app(app: Flask) -> None:
+    # Chamar depois de CORS(app): os hooks rodam em ordem inversa, então o 304 ainda
+    # recebe os cabeçalhos de CORS.
+    app.after_request(_apply_etag)
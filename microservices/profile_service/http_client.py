@@ -0,0 +1,63 @@
+"""Cliente HTTP de saída compartilhado pelo serviço.
+
+Todas as chamadas para outros serviços (skills_service e a API do Groq) passam
+por uma única ``requests.Session``: cada host mantém seu próprio pool de conexões
+keep-alive, evitando um novo handshake TCP+TLS a cada chamada. GETs (idempotentes) são
+repetidos com backoff exponencial em falhas de conexão e respostas 502/503/504.
+"""
+from threading import Lock
+
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import os
+import requests
+
+
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))  # hosts com pool próprio
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "32"))  # conexões mantidas por host
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.2"))
+
+_session: requests.Session | None = None
+_session_lock = Lock()
+
+
+def _build_session() -> requests.Session:
+    retry = Retry(
+        total=HTTP_MAX_RETRIES,
+        connect=HTTP_MAX_RETRIES,
+        read=HTTP_MAX_RETRIES,
+        status=HTTP_MAX_RETRIES,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Retorna a sessão compartilhada, criando-a na primeira chamada."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return get_session().get(url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return get_session().post(url, **kwargs)
@@ -1,11 +1,22 @@
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List
+from threading import Event, Lock, Thread
+from typing import Dict, Iterator, List, Tuple
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
+import contextvars
+import json
+import os
 import requests
 import sqlite3
+import time
+
+from cache import FRESH, STALE, TTLCache
+from matching import SkillMatrix, skill_key
+import etag
+import http_client
 
 
 DATABASE_PATH = Path(__file__).with_name("projects.db")
@@ -15,6 +26,79 @@ PROJETOS_API_URL = "https://bdprojetos.azurewebsites.net"
 AUTH_SERVICE_BASE = "https://colaboradores-auth.azurewebsites.net"
 PROFILE_SERVICE_BASE = "https://colaboradores-profile.azurewebsites.net"
 SKILLS_SERVICE_BASE = "https://colaboradores-skills.azurewebsites.net"
+AUTH_PAGE_LIMIT = 1000  # MAX_PAGE_LIMIT do /users/list no auth_service
+
+# Fan-out de /collaborators: limite de chamadas simultâneas e orçamento (s) por página
+COLLABORATORS_MAX_WORKERS = int(os.getenv("COLLABORATORS_MAX_WORKERS", "16"))
+COLLABORATORS_PAGE_BUDGET = float(os.getenv("COLLABORATORS_PAGE_BUDGET", "8"))
+
+_fanout_pool = ThreadPoolExecutor(
+    max_workers=max(1, COLLABORATORS_MAX_WORKERS), thread_name_prefix="collab-fanout"
+)
+
+# Prazo total (s) das chamadas externas feitas durante uma requisição
+REQUEST_DEADLINE = float(os.getenv("REQUEST_DEADLINE", "10"))
+MAX_BATCH_LINKS = int(os.getenv("MAX_BATCH_LINKS", "200"))
+
+# Export NDJSON: tamanho do bloco buscado por vez e prazo (s) para montar cada bloco
+EXPORT_CHUNK = int(os.getenv("EXPORT_CHUNK", "200"))
+EXPORT_CHUNK_DEADLINE = float(os.getenv("EXPORT_CHUNK_DEADLINE", "15"))
+
+# Cache de títulos de projetos da API externa (segundos); 404/falhas entram como cache negativo
+PROJECT_TITLE_CACHE_SIZE = int(os.getenv("PROJECT_TITLE_CACHE_SIZE", "2048"))
+PROJECT_TITLE_TTL = float(os.getenv("PROJECT_TITLE_TTL", "3600"))
+PROJECT_TITLE_STALE_TTL = float(os.getenv("PROJECT_TITLE_STALE_TTL", "86400"))
+PROJECT_TITLE_NEGATIVE_TTL = float(os.getenv("PROJECT_TITLE_NEGATIVE_TTL", "60"))
+PROJECT_TITLE_PERSIST = os.getenv("PROJECT_TITLE_PERSIST", "1") == "1"
+
+_title_cache = TTLCache(
+    maxsize=PROJECT_TITLE_CACHE_SIZE, ttl=PROJECT_TITLE_TTL, stale_ttl=PROJECT_TITLE_STALE_TTL
+)
+_titles_refreshing: set = set()
+_titles_refreshing_lock = Lock()
+
+# Cache do proxy /proxy/projects, por busca normalizada. Após o TTL a entrada ainda é
+# guardada por PROXY_PROJECTS_REVALIDATE_TTL para revalidação condicional (ETag/Last-Modified)
+PROXY_PROJECTS_CACHE_SIZE = int(os.getenv("PROXY_PROJECTS_CACHE_SIZE", "512"))
+PROXY_PROJECTS_TTL = float(os.getenv("PROXY_PROJECTS_TTL", "30"))
+PROXY_PROJECTS_REVALIDATE_TTL = float(os.getenv("PROXY_PROJECTS_REVALIDATE_TTL", "600"))
+
+_proxy_cache = TTLCache(
+    maxsize=PROXY_PROJECTS_CACHE_SIZE, ttl=PROXY_PROJECTS_TTL, stale_ttl=PROXY_PROJECTS_REVALIDATE_TTL
+)
+
+# Diretório local de colaboradores (read model), sincronizado em segundo plano
+DIRECTORY_SYNC_ENABLED = os.getenv("DIRECTORY_SYNC_ENABLED", "1") == "1"
+DIRECTORY_SYNC_INTERVAL = float(os.getenv("DIRECTORY_SYNC_INTERVAL", "120"))
+DIRECTORY_SYNC_CHUNK = int(os.getenv("DIRECTORY_SYNC_CHUNK", "200"))
+DIRECTORY_MAX_STALENESS = float(os.getenv("DIRECTORY_MAX_STALENESS", "900"))
+
+_directory_sync_lock = Lock()
+
+# Níveis de proficiência (mesmos valores de ALLOWED_PROFICIENCIES no skills_service)
+PROFICIENCY_LEVELS = {"basic": 1, "intermediate": 2, "advanced": 3}
+ALLOWED_AVAILABILITY = {"actively-looking", "exploring"}
+
+# Matriz de recomendação: intervalo mínimo (s) entre verificações de mudança no diretório
+MATCHING_REFRESH_INTERVAL = float(os.getenv("MATCHING_REFRESH_INTERVAL", "30"))
+MAX_RECOMMENDATIONS = 100
+
+_skill_matrix: SkillMatrix | None = None
+_skill_matrix_signature: Tuple | None = None
+_skill_matrix_checked_at = 0.0
+_skill_matrix_lock = Lock()
+
+# Outbox de notificações para PROJETOS_API_URL/projects/<id>/members
+OUTBOX_DISPATCH_ENABLED = os.getenv("OUTBOX_DISPATCH_ENABLED", "1") == "1"
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "5"))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "20"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_BASE_BACKOFF = float(os.getenv("OUTBOX_BASE_BACKOFF", "5"))
+OUTBOX_MAX_BACKOFF = float(os.getenv("OUTBOX_MAX_BACKOFF", "900"))
+OUTBOX_LEASE = float(os.getenv("OUTBOX_LEASE", "60"))  # reserva de uma entrega em andamento
+
+_outbox_wakeup = Event()
+_background_started = False
 
 
 def _now() -> str:
@@ -24,9 +108,652 @@ def _now() -> str:
 def get_conn() -> sqlite3.Connection:
     conn = sqlite3.connect(DATABASE_PATH)
     conn.row_factory = sqlite3.Row
+    # Usada pelos triggers de collaborator_skill_index
+    conn.create_function("skill_key", 1, skill_key, deterministic=True)
     return conn
 
 
+def _fetch_profile(uid: int) -> Dict | None:
+    try:
+        prof_res = http_client.get(f"{PROFILE_SERVICE_BASE}/profiles/{uid}", timeout=6)
+        return prof_res.json().get("profile") if prof_res.status_code == 200 else None
+    except requests.exceptions.RequestException:
+        return None
+
+
+def _fetch_skills(uid: int) -> List[Dict]:
+    try:
+        skills_res = http_client.get(f"{SKILLS_SERVICE_BASE}/users/{uid}/skills", timeout=6)
+        return skills_res.json().get("skills", []) if skills_res.status_code == 200 else []
+    except requests.exceptions.RequestException:
+        return []
+
+
+def _submit(fn, *args, **kwargs) -> Future:
+    """Envia ao pool levando o contexto atual (inclusive o prazo da requisição)."""
+    return _fanout_pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def _budget(seconds: float) -> float:
+    """Menor valor entre o orçamento pedido e o que resta do prazo da requisição."""
+    remaining = http_client.remaining_time()
+    return seconds if remaining is None else min(seconds, remaining)
+
+
+def _result_or_default(future: Future, default):
+    if future.done():
+        return future.result()
+    future.cancel()
+    return default
+
+
+def _fetch_profiles_bulk(user_ids: List[int]) -> Dict[int, Dict] | None:
+    """Uma chamada a GET /profiles?user_ids=...; None se o endpoint em lote falhar."""
+    try:
+        res = http_client.get(
+            f"{PROFILE_SERVICE_BASE}/profiles",
+            params={"user_ids": ",".join(str(uid) for uid in user_ids)},
+            timeout=6,
+        )
+        if res.status_code != 200:
+            return None
+        return {p["user_id"]: p for p in res.json().get("profiles", [])}
+    except (requests.exceptions.RequestException, ValueError):
+        return None
+
+
+def _fetch_skills_bulk(user_ids: List[int]) -> Dict[int, List[Dict]] | None:
+    """Uma chamada a GET /skills/by-users?user_ids=...; None se o endpoint em lote falhar."""
+    try:
+        res = http_client.get(
+            f"{SKILLS_SERVICE_BASE}/skills/by-users",
+            params={"user_ids": ",".join(str(uid) for uid in user_ids)},
+            timeout=6,
+        )
+        if res.status_code != 200:
+            return None
+        return {u["user_id"]: u.get("skills", []) for u in res.json().get("users", [])}
+    except (requests.exceptions.RequestException, ValueError):
+        return None
+
+
+def _fetch_users_bulk(user_ids: List[int]) -> Dict[int, Dict] | None:
+    """Uma chamada a GET /users?ids=... no auth_service; None se falhar."""
+    try:
+        res = http_client.get(
+            f"{AUTH_SERVICE_BASE}/users",
+            params={"ids": ",".join(str(uid) for uid in user_ids)},
+            timeout=6,
+        )
+        if res.status_code != 200:
+            return None
+        return {u["id"]: u for u in res.json().get("users", [])}
+    except (requests.exceptions.RequestException, ValueError):
+        return None
+
+
+def _fetch_details_bulk(user_ids: List[int]) -> Tuple[Dict[int, Dict | None], Dict[int, List[Dict]]]:
+    """Perfis e skills da página em duas chamadas em lote (paralelas).
+
+    Se algum serviço ainda não expõe o endpoint em lote, cai no fan-out por usuário.
+    """
+    if not user_ids:
+        return {}, {}
+    profiles_future = _submit(_fetch_profiles_bulk, user_ids)
+    skills_future = _submit(_fetch_skills_bulk, user_ids)
+    wait([profiles_future, skills_future], timeout=_budget(COLLABORATORS_PAGE_BUDGET))
+    # Lote que estourou o orçamento => página degradada; lote que falhou (None) => fan-out
+    profiles_map = _result_or_default(profiles_future, {})
+    skills_map = _result_or_default(skills_future, {})
+
+    if profiles_map is None or skills_map is None:
+        fallback_profiles, fallback_skills = _fetch_details_concurrently(user_ids)
+        profiles_map = profiles_map if profiles_map is not None else fallback_profiles
+        skills_map = skills_map if skills_map is not None else fallback_skills
+
+    profiles = {uid: profiles_map.get(uid) for uid in user_ids}
+    skills = {uid: skills_map.get(uid, []) for uid in user_ids}
+    return profiles, skills
+
+
+def _fetch_details_concurrently(user_ids: List[int]) -> Tuple[Dict[int, Dict | None], Dict[int, List[Dict]]]:
+    """Busca perfil e skills de vários usuários em paralelo, respeitando o orçamento da página.
+
+    Chamadas que não terminam dentro de COLLABORATORS_PAGE_BUDGET são descartadas e o
+    colaborador volta degradado (perfil None, skills vazias) em vez de segurar a página.
+    """
+    profile_futures = {uid: _submit(_fetch_profile, uid) for uid in user_ids}
+    skills_futures = {uid: _submit(_fetch_skills, uid) for uid in user_ids}
+    wait(
+        list(profile_futures.values()) + list(skills_futures.values()),
+        timeout=_budget(COLLABORATORS_PAGE_BUDGET),
+    )
+
+    profiles = {uid: _result_or_default(fut, None) for uid, fut in profile_futures.items()}
+    skills = {uid: _result_or_default(fut, []) for uid, fut in skills_futures.items()}
+    return profiles, skills
+
+
+def _fetch_project_title(pid: int) -> Tuple[str | None, bool]:
+    """Consulta a API externa. Retorna (título, definitivo); 404 é definitivo, falhas não."""
+    try:
+        resp = http_client.get(f"{PROJETOS_API_URL}/projects/{pid}", timeout=6)
+        if resp.status_code == 200:
+            data = resp.json()
+            # Tenta campos comuns: 'title' ou 'name'
+            return data.get("title") or data.get("name"), True
+        return None, resp.status_code == 404
+    except (requests.exceptions.RequestException, ValueError):
+        return None, False
+
+
+def _store_project_title(pid: int, title: str | None, definitive: bool) -> None:
+    if not definitive:
+        # Falha transitória: mantém um título já conhecido, senão cache negativo curto
+        _, previous = _title_cache.get(pid)
+        if previous is not None:
+            _title_cache.set(pid, previous, ttl=PROJECT_TITLE_NEGATIVE_TTL)
+        else:
+            _title_cache.set(pid, None, ttl=PROJECT_TITLE_NEGATIVE_TTL, stale_ttl=0)
+        return
+
+    if title is None:
+        _title_cache.set(pid, None, ttl=PROJECT_TITLE_NEGATIVE_TTL, stale_ttl=0)
+    else:
+        _title_cache.set(pid, title)
+
+    if PROJECT_TITLE_PERSIST:
+        with get_conn() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO project_titles (project_id, title, fetched_at)
+                VALUES (?, ?, ?)
+                """,
+                (pid, title, time.time()),
+            )
+            conn.commit()
+
+
+def _refresh_project_title(pid: int) -> None:
+    try:
+        _store_project_title(pid, *_fetch_project_title(pid))
+    finally:
+        with _titles_refreshing_lock:
+            _titles_refreshing.discard(pid)
+
+
+def _schedule_title_refresh(pid: int) -> None:
+    with _titles_refreshing_lock:
+        if pid in _titles_refreshing:
+            return
+        _titles_refreshing.add(pid)
+    _fanout_pool.submit(_refresh_project_title, pid)
+
+
+def _load_persisted_titles(pids: List[int]) -> None:
+    """Aquece o cache em memória com títulos salvos em projects.db."""
+    placeholders = ",".join("?" for _ in pids)
+    with get_conn() as conn:
+        rows = conn.execute(
+            f"SELECT project_id, title, fetched_at FROM project_titles WHERE project_id IN ({placeholders})",
+            pids,
+        ).fetchall()
+    for row in rows:
+        if row["title"] is None:
+            _title_cache.set(
+                row["project_id"], None, ttl=PROJECT_TITLE_NEGATIVE_TTL, stale_ttl=0,
+                stored_at=row["fetched_at"],
+            )
+        else:
+            _title_cache.set(row["project_id"], row["title"], stored_at=row["fetched_at"])
+
+
+def _resolve_project_titles(pids: List[int]) -> Dict[int, str | None]:
+    """Títulos via cache (memória -> projects.db -> API). Entradas velhas são servidas
+    imediatamente e revalidadas em segundo plano."""
+    titles: Dict[int, str | None] = {}
+
+    def lookup(candidates: List[int]) -> List[int]:
+        not_found = []
+        for pid in candidates:
+            state, title = _title_cache.get(pid)
+            if state in (FRESH, STALE):
+                titles[pid] = title
+                if state == STALE:
+                    _schedule_title_refresh(pid)
+            else:
+                not_found.append(pid)
+        return not_found
+
+    missing = lookup(pids)
+    if missing and PROJECT_TITLE_PERSIST:
+        _load_persisted_titles(missing)
+        missing = lookup(missing)
+
+    if missing:
+        futures = {pid: _submit(_fetch_project_title, pid) for pid in missing}
+        wait(list(futures.values()), timeout=_budget(COLLABORATORS_PAGE_BUDGET))
+        for pid, fut in futures.items():
+            title, definitive = _result_or_default(fut, (None, False))
+            _store_project_title(pid, title, definitive)
+            titles[pid] = title
+    return titles
+
+
+def _proxy_response(entry: Dict, cache_status: str) -> Response:
+    resp = Response(entry["body"], status=200, content_type=entry["content_type"])
+    resp.headers["X-Cache"] = cache_status
+    return resp
+
+
+def _serialize_directory_row(row: sqlite3.Row) -> Dict:
+    return {
+        "user_id": row["user_id"],
+        "email": row["email"],
+        "full_name": row["full_name"],
+        "availability": row["availability"],
+        "skills": json.loads(row["skills_json"]),
+    }
+
+
+def _directory_synced_at() -> str | None:
+    """Horário da última sincronização completa, se ainda dentro de DIRECTORY_MAX_STALENESS."""
+    with get_conn() as conn:
+        state = conn.execute(
+            "SELECT last_synced_at, last_sync_epoch FROM directory_sync_state WHERE id = 1"
+        ).fetchone()
+    if not state or state["last_sync_epoch"] is None:
+        return None
+    if time.time() - state["last_sync_epoch"] > DIRECTORY_MAX_STALENESS:
+        return None
+    return state["last_synced_at"]
+
+
+def _iter_user_chunks(chunk_size: int) -> Iterator[List[Dict]]:
+    """Percorre os usuários do auth_service em páginas por cursor (after_id/limit)."""
+    after_id = 0
+    while True:
+        res = http_client.get(
+            f"{AUTH_SERVICE_BASE}/users/list",
+            params={"after_id": after_id, "limit": chunk_size},
+            timeout=10,
+        )
+        res.raise_for_status()
+        data = res.json()
+        users = data.get("users", [])
+        if "next_after_id" not in data:
+            # auth_service sem paginação por cursor: devolveu a lista completa
+            for start in range(0, len(users), chunk_size):
+                yield users[start:start + chunk_size]
+            return
+        if users:
+            yield users
+        if data["next_after_id"] is None:
+            return
+        after_id = data["next_after_id"]
+
+
+def _fetch_users_window(offset: int, count: int) -> Tuple[List[Dict], int | None]:
+    """Usuários nas posições [offset, offset + count) do auth_service, paginando por cursor
+    só até a janela pedida em vez de baixar a lista inteira. Devolve também o total
+    informado pelo auth (None se ele não informar)."""
+    after_id = 0
+    read = 0  # usuários já lidos antes da página atual
+    window: List[Dict] = []
+    while True:
+        res = http_client.get(
+            f"{AUTH_SERVICE_BASE}/users/list",
+            params={"after_id": after_id, "limit": min(offset + count - read, AUTH_PAGE_LIMIT)},
+            timeout=10,
+        )
+        res.raise_for_status()
+        data = res.json()
+        users = data.get("users", [])
+        if "next_after_id" not in data:
+            # auth_service sem paginação por cursor: devolveu a lista completa
+            return users[offset:offset + count], len(users)
+        window.extend(users[max(0, offset - read):offset + count - read])
+        read += len(users)
+        if read >= offset + count or data["next_after_id"] is None:
+            return window, data.get("total")
+        after_id = data["next_after_id"]
+
+
+def sync_collaborator_directory() -> Dict:
+    """Atualiza collaborator_directory a partir de auth, profile e skills.
+
+    Usuários são processados em blocos de DIRECTORY_SYNC_CHUNK com os endpoints em lote;
+    só linhas cujo conteúdo mudou são regravadas. Blocos que falham mantêm os dados
+    anteriores, e remoções só são aplicadas quando todos os blocos foram lidos.
+    """
+    if not _directory_sync_lock.acquire(blocking=False):
+        return {"skipped": True}
+    try:
+        total_users = 0
+        changed = 0
+        failed_chunks = 0
+        seen = set()
+        for chunk in _iter_user_chunks(DIRECTORY_SYNC_CHUNK):
+            total_users += len(chunk)
+            ids = [u["id"] for u in chunk]
+            profiles = _fetch_profiles_bulk(ids)
+            skills = _fetch_skills_bulk(ids)
+            if profiles is None or skills is None:
+                failed_chunks += 1
+                continue
+
+            timestamp = _now()
+            rows = []
+            for u in chunk:
+                uid = u["id"]
+                profile = profiles.get(uid)
+                seen.add(uid)
+                rows.append(
+                    (
+                        uid,
+                        u.get("email"),
+                        (profile or {}).get("full_name"),
+                        (profile or {}).get("availability"),
+                        json.dumps(profile, sort_keys=True) if profile else None,
+                        json.dumps(skills.get(uid, []), sort_keys=True),
+                        timestamp,
+                    )
+                )
+            with get_conn() as conn:
+                before = conn.total_changes
+                conn.executemany(
+                    """
+                    INSERT INTO collaborator_directory
+                        (user_id, email, full_name, availability, profile_json, skills_json, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(user_id) DO UPDATE SET
+                        email = excluded.email,
+                        full_name = excluded.full_name,
+                        availability = excluded.availability,
+                        profile_json = excluded.profile_json,
+                        skills_json = excluded.skills_json,
+                        updated_at = excluded.updated_at
+                    WHERE collaborator_directory.email IS NOT excluded.email
+                       OR collaborator_directory.profile_json IS NOT excluded.profile_json
+                       OR collaborator_directory.skills_json IS NOT excluded.skills_json
+                    """,
+                    rows,
+                )
+                changed += conn.total_changes - before
+                conn.commit()
+
+        with get_conn() as conn:
+            removed = 0
+            if failed_chunks == 0:
+                existing = {r["user_id"] for r in conn.execute("SELECT user_id FROM collaborator_directory")}
+                stale_ids = [(uid,) for uid in existing - seen]
+                conn.executemany("DELETE FROM collaborator_directory WHERE user_id = ?", stale_ids)
+                removed = len(stale_ids)
+                conn.execute(
+                    """
+                    INSERT INTO directory_sync_state (id, last_synced_at, last_sync_epoch, users, changed)
+                    VALUES (1, ?, ?, ?, ?)
+                    ON CONFLICT(id) DO UPDATE SET
+                        last_synced_at = excluded.last_synced_at,
+                        last_sync_epoch = excluded.last_sync_epoch,
+                        users = excluded.users,
+                        changed = excluded.changed
+                    """,
+                    (_now(), time.time(), len(seen), changed + removed),
+                )
+            conn.commit()
+        return {"users": total_users, "changed": changed, "removed": removed, "failed_chunks": failed_chunks}
+    except (requests.exceptions.RequestException, ValueError) as e:
+        return {"error": str(e)}
+    finally:
+        _directory_sync_lock.release()
+
+
+def iter_collaborators_export() -> Iterator[Dict]:
+    """Percorre todos os colaboradores em blocos de EXPORT_CHUNK, com memória constante.
+
+    Com o diretório local atualizado, lê direto de collaborator_directory; senão pagina o
+    auth_service por cursor e busca perfis e skills de cada bloco com os endpoints em lote.
+    """
+    if _directory_synced_at():
+        # Cada bloco é uma consulta por chave (user_id > último) numa conexão fechada antes do
+        # yield: um cursor aberto durante o streaming seguraria o lock SHARED do SQLite e
+        # travaria as escritas enquanto o cliente lê devagar.
+        last_user_id = 0
+        while True:
+            conn = get_conn()
+            try:
+                rows = conn.execute(
+                    """
+                    SELECT user_id, email, full_name, availability, skills_json
+                    FROM collaborator_directory WHERE user_id > ?
+                    ORDER BY user_id ASC LIMIT ?
+                    """,
+                    (last_user_id, EXPORT_CHUNK),
+                ).fetchall()
+            finally:
+                conn.close()
+            if not rows:
+                return
+            last_user_id = rows[-1]["user_id"]
+            for row in rows:
+                yield _serialize_directory_row(row)
+
+    chunks = _iter_user_chunks(EXPORT_CHUNK)
+    while True:
+        with http_client.deadline(EXPORT_CHUNK_DEADLINE):
+            chunk = next(chunks, None)
+            if chunk is None:
+                return
+            profiles, skills_by_user = _fetch_details_bulk([u["id"] for u in chunk])
+        for u in chunk:
+            profile = profiles.get(u["id"])
+            yield {
+                "user_id": u["id"],
+                "email": u.get("email"),
+                "full_name": (profile or {}).get("full_name"),
+                "availability": (profile or {}).get("availability"),
+                "skills": skills_by_user.get(u["id"], []),
+            }
+
+
+def _directory_sync_loop() -> None:
+    while True:
+        try:
+            result = sync_collaborator_directory()
+            if result.get("error") or result.get("failed_chunks"):
+                print("[DIRECTORY_SYNC]", result)
+        except Exception as e:  # a thread de sync nunca deve morrer
+            print("[DIRECTORY_SYNC_ERROR]", e)
+        time.sleep(DIRECTORY_SYNC_INTERVAL)
+
+
+def get_skill_matrix() -> SkillMatrix:
+    """Matriz usuários × skills do diretório, reconstruída só quando o diretório muda."""
+    global _skill_matrix, _skill_matrix_signature, _skill_matrix_checked_at
+    with _skill_matrix_lock:
+        if _skill_matrix is not None and time.time() - _skill_matrix_checked_at < MATCHING_REFRESH_INTERVAL:
+            return _skill_matrix
+        with get_conn() as conn:
+            signature = tuple(
+                conn.execute("SELECT COUNT(*), MAX(updated_at) FROM collaborator_directory").fetchone()
+            )
+            if _skill_matrix is None or signature != _skill_matrix_signature:
+                rows = conn.execute(
+                    "SELECT user_id, availability, skills_json FROM collaborator_directory ORDER BY user_id"
+                )
+                _skill_matrix = SkillMatrix.build(
+                    ((r["user_id"], r["availability"], r["skills_json"]) for r in rows),
+                    PROFICIENCY_LEVELS,
+                )
+                _skill_matrix_signature = signature
+        _skill_matrix_checked_at = time.time()
+        return _skill_matrix
+
+
+def _parse_skill_requirements(raw: str) -> List[Tuple[str, int]] | None:
+    """'Python:advanced,UX/UI Design:intermediate' -> [('python', 3), ('ux/ui design', 2)]."""
+    requirements: Dict[str, int] = {}
+    for part in raw.split(","):
+        if not part.strip():
+            continue
+        name, _, level = part.partition(":")
+        name = skill_key(name)
+        level = level.strip().lower() or "basic"
+        if not name or level not in PROFICIENCY_LEVELS:
+            return None
+        requirements[name] = max(requirements.get(name, 0), PROFICIENCY_LEVELS[level])
+    return list(requirements.items())
+
+
+def _enqueue_member_notification(conn: sqlite3.Connection, project_id: int, user_id: int, payload: Dict) -> int:
+    """Grava a notificação no outbox usando a transação do chamador."""
+    cursor = conn.execute(
+        """
+        INSERT INTO member_outbox (project_id, user_id, payload, status, attempts, next_attempt_at, created_at)
+        VALUES (?, ?, ?, 'pending', 0, ?, ?)
+        """,
+        (project_id, user_id, json.dumps(payload), time.time(), _now()),
+    )
+    return cursor.lastrowid
+
+
+def _enqueue_member_notifications(conn: sqlite3.Connection, project_id: int, items: List[Tuple[int, Dict]]) -> None:
+    """Versão em lote de _enqueue_member_notification: [(user_id, payload), ...]."""
+    now_epoch, created_at = time.time(), _now()
+    conn.executemany(
+        """
+        INSERT INTO member_outbox (project_id, user_id, payload, status, attempts, next_attempt_at, created_at)
+        VALUES (?, ?, ?, 'pending', 0, ?, ?)
+        """,
+        [(project_id, uid, json.dumps(payload), now_epoch, created_at) for uid, payload in items],
+    )
+
+
+def _serialize_outbox_row(row: sqlite3.Row) -> Dict:
+    return {
+        "id": row["id"],
+        "project_id": row["project_id"],
+        "user_id": row["user_id"],
+        "status": row["status"],
+        "attempts": row["attempts"],
+        "last_error": row["last_error"],
+        "created_at": row["created_at"],
+        "delivered_at": row["delivered_at"],
+    }
+
+
+def _deliver_member_notification(row: sqlite3.Row) -> Tuple[str, str | None]:
+    """Envia uma notificação. Retorna ('delivered' | 'retry' | 'failed', erro)."""
+    try:
+        res = http_client.post(
+            f"{PROJETOS_API_URL}/projects/{row['project_id']}/members",
+            json=json.loads(row["payload"]),
+            timeout=10,
+        )
+    except requests.exceptions.RequestException as e:
+        return "retry", str(e)
+    # 200/201 são sucesso; 409 (já vinculado na API externa) também, por idempotência
+    if res.status_code in (200, 201, 409):
+        return "delivered", None
+    error = f"HTTP {res.status_code}: {res.text[:300]}"
+    if res.status_code >= 500 or res.status_code in (408, 429):
+        return "retry", error
+    return "failed", error
+
+
+def dispatch_member_outbox() -> Dict[str, int]:
+    """Entrega um lote de notificações pendentes cujo horário de tentativa chegou.
+
+    Cada linha é reservada por OUTBOX_LEASE segundos antes do envio, para que outro
+    worker (ou processo) não a envie ao mesmo tempo; se o processo morrer, a reserva
+    expira e a linha volta a ser elegível.
+    """
+    now = time.time()
+    with get_conn() as conn:
+        candidates = conn.execute(
+            """
+            SELECT * FROM member_outbox
+            WHERE status = 'pending' AND next_attempt_at <= ?
+            ORDER BY next_attempt_at ASC
+            LIMIT ?
+            """,
+            (now, OUTBOX_BATCH_SIZE),
+        ).fetchall()
+
+    counts = {"delivered": 0, "retry": 0, "failed": 0}
+    for row in candidates:
+        with get_conn() as conn:
+            claimed = conn.execute(
+                """
+                UPDATE member_outbox SET next_attempt_at = ?
+                WHERE id = ? AND status = 'pending' AND next_attempt_at = ?
+                """,
+                (time.time() + OUTBOX_LEASE, row["id"], row["next_attempt_at"]),
+            ).rowcount
+            conn.commit()
+        if not claimed:
+            continue
+
+        outcome, error = _deliver_member_notification(row)
+        attempts = row["attempts"] + 1
+        if outcome == "retry" and attempts >= OUTBOX_MAX_ATTEMPTS:
+            outcome = "failed"
+        counts[outcome] += 1
+
+        with get_conn() as conn:
+            if outcome == "delivered":
+                conn.execute(
+                    """
+                    UPDATE member_outbox
+                    SET status = 'delivered', attempts = ?, last_error = NULL, delivered_at = ?
+                    WHERE id = ? AND status = 'pending'
+                    """,
+                    (attempts, _now(), row["id"]),
+                )
+            else:
+                backoff = min(OUTBOX_MAX_BACKOFF, OUTBOX_BASE_BACKOFF * (2 ** (attempts - 1)))
+                conn.execute(
+                    """
+                    UPDATE member_outbox
+                    SET status = ?, attempts = ?, last_error = ?, next_attempt_at = ?
+                    WHERE id = ? AND status = 'pending'
+                    """,
+                    (
+                        "failed" if outcome == "failed" else "pending",
+                        attempts,
+                        error,
+                        time.time() + backoff,
+                        row["id"],
+                    ),
+                )
+            conn.commit()
+    return counts
+
+
+def _outbox_dispatch_loop() -> None:
+    while True:
+        try:
+            counts = dispatch_member_outbox()
+            if counts["failed"]:
+                print("[OUTBOX_FAILED]", counts)
+        except Exception as e:  # o dispatcher nunca deve morrer
+            print("[OUTBOX_ERROR]", e)
+        _outbox_wakeup.wait(OUTBOX_POLL_INTERVAL)
+        _outbox_wakeup.clear()
+
+
+def _start_background_workers() -> None:
+    global _background_started
+    if _background_started:
+        return
+    _background_started = True
+    if DIRECTORY_SYNC_ENABLED:
+        Thread(target=_directory_sync_loop, name="directory-sync", daemon=True).start()
+    if OUTBOX_DISPATCH_ENABLED:
+        Thread(target=_outbox_dispatch_loop, name="outbox-dispatch", daemon=True).start()
+
+
 def init_db():
     """Cria tabela para vincular colaboradores aos projetos."""
     with get_conn() as conn:
@@ -43,14 +770,146 @@ def init_db():
             )
             """
         )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS project_titles (
+                project_id INTEGER PRIMARY KEY,
+                title TEXT,
+                fetched_at REAL NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS collaborator_directory (
+                user_id INTEGER PRIMARY KEY,
+                email TEXT,
+                full_name TEXT,
+                availability TEXT,
+                profile_json TEXT,
+                skills_json TEXT NOT NULL DEFAULT '[]',
+                updated_at TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_collaborator_directory_email ON collaborator_directory (email)"
+        )
+        # Índice invertido (skill, nível) -> user_id, mantido por triggers sobre o diretório.
+        # Os triggers chamam skill_key(), registrada em get_conn(): qualquer escrita em
+        # collaborator_directory por outra conexão (sqlite3 CLI, scripts) precisa registrar a
+        # mesma função (matching.skill_key), senão falha com "no such function: skill_key".
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS collaborator_skill_index (
+                skill_key TEXT NOT NULL,
+                level INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                PRIMARY KEY (skill_key, level, user_id)
+            ) WITHOUT ROWID
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_collaborator_skill_index_user ON collaborator_skill_index (user_id)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_collaborator_directory_availability ON collaborator_directory (availability, user_id)"
+        )
+        index_rows_sql = """
+            SELECT skill_key(json_extract(value, '$.skill_name')),
+                   CASE json_extract(value, '$.proficiency')
+                       WHEN 'advanced' THEN 3 WHEN 'intermediate' THEN 2 ELSE 1 END,
+                   {user_id}
+            FROM json_each({skills_json})
+            WHERE skill_key(json_extract(value, '$.skill_name')) <> ''
+        """
+        conn.executescript(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_directory_skills_insert
+            AFTER INSERT ON collaborator_directory
+            BEGIN
+                INSERT OR IGNORE INTO collaborator_skill_index (skill_key, level, user_id)
+                {index_rows_sql.format(user_id="NEW.user_id", skills_json="NEW.skills_json")};
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_directory_skills_update
+            AFTER UPDATE OF skills_json ON collaborator_directory
+            BEGIN
+                DELETE FROM collaborator_skill_index WHERE user_id = OLD.user_id;
+                INSERT OR IGNORE INTO collaborator_skill_index (skill_key, level, user_id)
+                {index_rows_sql.format(user_id="NEW.user_id", skills_json="NEW.skills_json")};
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_directory_skills_delete
+            AFTER DELETE ON collaborator_directory
+            BEGIN
+                DELETE FROM collaborator_skill_index WHERE user_id = OLD.user_id;
+            END;
+            """
+        )
+        # Bases sincronizadas antes dos triggers existirem
+        if not conn.execute("SELECT 1 FROM collaborator_skill_index LIMIT 1").fetchone():
+            conn.execute(
+                "INSERT OR IGNORE INTO collaborator_skill_index (skill_key, level, user_id) "
+                + index_rows_sql.format(user_id="d.user_id", skills_json="d.skills_json").replace(
+                    "FROM json_each(d.skills_json)", "FROM collaborator_directory d, json_each(d.skills_json)"
+                )
+            )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS member_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                project_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                last_error TEXT,
+                created_at TEXT NOT NULL,
+                delivered_at TEXT
+            )
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_member_outbox_due ON member_outbox (status, next_attempt_at)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_member_outbox_link ON member_outbox (project_id, user_id)"
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS directory_sync_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                last_synced_at TEXT,
+                last_sync_epoch REAL,
+                users INTEGER,
+                changed INTEGER
+            )
+            """
+        )
         conn.commit()
 
 
 def create_app() -> Flask:
     """Factory que configura e retorna o app Flask."""
     init_db()
+    _start_background_workers()
     app = Flask(__name__)
     CORS(app)
+    etag.init_app(app)
+
+    @app.before_request
+    def start_request_deadline():
+        # Todas as chamadas externas da requisição dividem o mesmo prazo
+        g.deadline = http_client.deadline(REQUEST_DEADLINE)
+        g.deadline.__enter__()
+
+    @app.teardown_request
+    def end_request_deadline(_exc):
+        deadline = g.pop("deadline", None)
+        if deadline is not None:
+            deadline.__exit__(None, None, None)
 
     @app.get("/health")
     def health():
@@ -58,15 +917,25 @@ def create_app() -> Flask:
 
     @app.post("/projects/<int:project_id>/collaborators/<int:user_id>")
     def link_collaborator(project_id: int, user_id: int):
-        """Vincula colaborador ao projeto e notifica API externa."""
+        """Vincula colaborador ao projeto; a API externa é notificada via outbox."""
         try:
-            # 1. Buscar dados do colaborador nos outros serviços
-            profile_url = f"{PROFILE_SERVICE_BASE}/profiles/{user_id}"
-            skills_url = f"{SKILLS_SERVICE_BASE}/users/{user_id}/skills"
-            
+            # 1. Verificar se já está vinculado (antes de qualquer chamada de rede)
+            with get_conn() as conn:
+                existing = conn.execute(
+                    "SELECT id FROM project_collaborators WHERE project_id = ? AND user_id = ?",
+                    (project_id, user_id)
+                ).fetchone()
+                if existing:
+                    return jsonify(error="Colaborador já vinculado a este projeto"), 409
+
+            # 2. Buscar perfil, skills e email nos outros serviços, em paralelo
+            profile_future = _submit(http_client.get, f"{PROFILE_SERVICE_BASE}/profiles/{user_id}", timeout=5)
+            skills_future = _submit(http_client.get, f"{SKILLS_SERVICE_BASE}/users/{user_id}/skills", timeout=5)
+            auth_future = _submit(http_client.get, f"{AUTH_SERVICE_BASE}/users/{user_id}", timeout=5)
+
             try:
-                profile_res = requests.get(profile_url, timeout=5)
-                skills_res = requests.get(skills_url, timeout=5)
+                profile_res = profile_future.result()
+                skills_res = skills_future.result()
             except requests.exceptions.RequestException as e:
                 return jsonify(error=f"Erro ao buscar dados do colaborador: {str(e)}"), 500
 
@@ -78,15 +947,14 @@ def create_app() -> Flask:
             profile_data = profile_res.json().get("profile", {})
             skills_data = skills_res.json().get("skills", [])
 
-            # 2. Pegar primeira skill (ou usar padrão)
+            # 3. Pegar primeira skill (ou usar padrão)
             main_skill = skills_data[0] if skills_data else {}
             skill_name = main_skill.get("skill_name", "Geral")
             skill_level = main_skill.get("proficiency", "basic")
 
-            # 3. Buscar email do auth_service
-            auth_url = f"{AUTH_SERVICE_BASE}/users/{user_id}"
+            # 4. Email do auth_service
             try:
-                auth_res = requests.get(auth_url, timeout=5)
+                auth_res = auth_future.result()
                 if auth_res.status_code != 200:
                     return jsonify(error="Usuário não encontrado no auth"), 404
                 user_data = auth_res.json().get("user", {})
@@ -94,41 +962,14 @@ def create_app() -> Flask:
             except requests.exceptions.RequestException:
                 return jsonify(error="Erro ao buscar email do usuário"), 500
 
-            # 4. Verificar se já está vinculado
-            with get_conn() as conn:
-                existing = conn.execute(
-                    "SELECT id FROM project_collaborators WHERE project_id = ? AND user_id = ?",
-                    (project_id, user_id)
-                ).fetchone()
-                if existing:
-                    return jsonify(error="Colaborador já vinculado a este projeto"), 409
-
-            # 5. Notificar API externa de Projetos
+            # 5. Salvar vínculo e notificação (outbox) na mesma transação; a entrega para a
+            #    API externa de Projetos é feita pelo dispatcher em segundo plano
             payload = {
                 "collaborator_email": email,
                 "contributed_skill_name": skill_name,
                 "contributed_skill_level": skill_level
             }
-            
-            try:
-                external_res = requests.post(
-                    f"{PROJETOS_API_URL}/projects/{project_id}/members",
-                    json=payload,
-                    timeout=10
-                )
-                # Trata 200/201 como sucesso; 409 (já vinculado) também deve ser tratado como idempotente/sucesso
-                if external_res.status_code not in (200, 201):
-                    if external_res.status_code == 409:
-                        # Idempotência: já vinculado na API externa, seguir adiante para garantir persistência local
-                        pass
-                    else:
-                        return jsonify(
-                            error=f"Falha ao notificar API de Projetos: {external_res.text}"
-                        ), 500
-            except requests.exceptions.RequestException as e:
-                return jsonify(error=f"Erro ao conectar à API de Projetos: {str(e)}"), 500
-
-            # 6. Salvar vínculo localmente
+            outbox_id = None
             with get_conn() as conn:
                 cursor = conn.execute(
                     """
@@ -137,7 +978,6 @@ def create_app() -> Flask:
                     """,
                     (project_id, user_id, skill_name, skill_level, _now())
                 )
-                conn.commit()
                 if cursor.rowcount == 0:
                     # Já existia localmente; recuperar id existente
                     existing_row = conn.execute(
@@ -147,6 +987,10 @@ def create_app() -> Flask:
                     link_id = existing_row["id"] if existing_row else None
                 else:
                     link_id = cursor.lastrowid
+                    outbox_id = _enqueue_member_notification(conn, project_id, user_id, payload)
+                conn.commit()
+            if outbox_id is not None:
+                _outbox_wakeup.set()
 
             return jsonify(
                 message="Colaborador vinculado com sucesso",
@@ -154,16 +998,205 @@ def create_app() -> Flask:
                 project_id=project_id,
                 user_id=user_id,
                 skill_name=skill_name,
-                skill_level=skill_level
+                skill_level=skill_level,
+                notification={"outbox_id": outbox_id, "status": "pending"} if outbox_id else None
             ), 201
 
         except Exception as e:
             return jsonify(error=f"Erro interno: {str(e)}"), 500
 
+    @app.post("/projects/<int:project_id>/collaborators:batch")
+    def link_collaborators_batch(project_id: int):
+        """Vincula vários colaboradores de uma vez: {"user_ids": [1, 2, 3]}.
+
+        Os dados vêm de três chamadas em lote (auth, profile, skills) e todos os vínculos
+        e notificações são gravados em uma única transação. Retorna o resultado por usuário.
+        """
+        payload = request.get_json(silent=True) or {}
+        raw_ids = payload.get("user_ids")
+        if not isinstance(raw_ids, list) or not raw_ids:
+            return jsonify(error="user_ids deve ser uma lista não vazia de inteiros"), 400
+        if not all(isinstance(uid, int) and not isinstance(uid, bool) and uid > 0 for uid in raw_ids):
+            return jsonify(error="user_ids deve ser uma lista não vazia de inteiros"), 400
+        user_ids = list(dict.fromkeys(raw_ids))
+        if len(user_ids) > MAX_BATCH_LINKS:
+            return jsonify(error=f"no máximo {MAX_BATCH_LINKS} colaboradores por lote"), 400
+
+        results: Dict[int, Dict] = {}
+        placeholders = ",".join("?" for _ in user_ids)
+        with get_conn() as conn:
+            already = {
+                row["user_id"]
+                for row in conn.execute(
+                    f"SELECT user_id FROM project_collaborators WHERE project_id = ? AND user_id IN ({placeholders})",
+                    [project_id, *user_ids],
+                )
+            }
+        for uid in already:
+            results[uid] = {"user_id": uid, "status": "already_linked"}
+
+        pending = [uid for uid in user_ids if uid not in already]
+        if pending:
+            users_future = _submit(_fetch_users_bulk, pending)
+            profiles_future = _submit(_fetch_profiles_bulk, pending)
+            skills_future = _submit(_fetch_skills_bulk, pending)
+            users, profiles, skills = users_future.result(), profiles_future.result(), skills_future.result()
+            if users is None or profiles is None or skills is None:
+                return jsonify(error="Erro ao buscar dados dos colaboradores"), 502
+
+            to_link: List[Tuple[int, str, str, str]] = []
+            for uid in pending:
+                if uid not in profiles:
+                    results[uid] = {"user_id": uid, "status": "error", "error": "Perfil não encontrado"}
+                elif uid not in users:
+                    results[uid] = {"user_id": uid, "status": "error", "error": "Usuário não encontrado no auth"}
+                else:
+                    main_skill = (skills.get(uid) or [{}])[0]
+                    to_link.append(
+                        (
+                            uid,
+                            users[uid].get("email", ""),
+                            main_skill.get("skill_name", "Geral"),
+                            main_skill.get("proficiency", "basic"),
+                        )
+                    )
+
+            if to_link:
+                created_at = _now()
+                with get_conn() as conn:
+                    conn.execute("BEGIN IMMEDIATE")
+                    # Rechecagem dentro da transação: outro pedido pode ter vinculado alguém
+                    link_placeholders = ",".join("?" for _ in to_link)
+                    raced = {
+                        row["user_id"]
+                        for row in conn.execute(
+                            f"SELECT user_id FROM project_collaborators WHERE project_id = ? AND user_id IN ({link_placeholders})",
+                            [project_id, *(item[0] for item in to_link)],
+                        )
+                    }
+                    for uid in raced:
+                        results[uid] = {"user_id": uid, "status": "already_linked"}
+                    to_link = [item for item in to_link if item[0] not in raced]
+
+                    conn.executemany(
+                        """
+                        INSERT INTO project_collaborators (project_id, user_id, skill_name, skill_level, created_at)
+                        VALUES (?, ?, ?, ?, ?)
+                        """,
+                        [(project_id, uid, name, level, created_at) for uid, _, name, level in to_link],
+                    )
+                    _enqueue_member_notifications(
+                        conn,
+                        project_id,
+                        [
+                            (
+                                uid,
+                                {
+                                    "collaborator_email": email,
+                                    "contributed_skill_name": name,
+                                    "contributed_skill_level": level,
+                                },
+                            )
+                            for uid, email, name, level in to_link
+                        ],
+                    )
+                    linked_ids = [item[0] for item in to_link]
+                    link_ids = {
+                        row["user_id"]: row["id"]
+                        for row in conn.execute(
+                            f"""
+                            SELECT id, user_id FROM project_collaborators
+                            WHERE project_id = ? AND user_id IN ({",".join("?" for _ in linked_ids) or "NULL"})
+                            """,
+                            [project_id, *linked_ids],
+                        )
+                    }
+                    conn.commit()
+                if to_link:
+                    _outbox_wakeup.set()
+
+                for uid, _, name, level in to_link:
+                    results[uid] = {
+                        "user_id": uid,
+                        "status": "linked",
+                        "link_id": link_ids.get(uid),
+                        "skill_name": name,
+                        "skill_level": level,
+                    }
+
+        ordered = [results[uid] for uid in user_ids]
+        summary: Dict[str, int] = {}
+        for item in ordered:
+            summary[item["status"]] = summary.get(item["status"], 0) + 1
+        return jsonify(project_id=project_id, summary=summary, results=ordered)
+
+    @app.get("/projects/<int:project_id>/recommendations")
+    def recommend_collaborators(project_id: int):
+        """Sugere colaboradores para o projeto.
+
+        Ex.: GET /projects/1/recommendations?skills=Python:advanced,UX/UI Design:intermediate&limit=20
+        Quem já está vinculado ao projeto não aparece.
+        """
+        requirements = _parse_skill_requirements(request.args.get("skills", ""))
+        if not requirements:
+            return jsonify(
+                error="skills deve ser uma lista 'Skill:nivel' separada por vírgula (basic, intermediate ou advanced)"
+            ), 400
+        try:
+            limit = int(request.args.get("limit", 20))
+        except ValueError:
+            limit = 20
+        limit = min(max(1, limit), MAX_RECOMMENDATIONS)
+
+        with get_conn() as conn:
+            state = conn.execute(
+                "SELECT last_synced_at FROM directory_sync_state WHERE id = 1"
+            ).fetchone()
+            if not state:
+                return jsonify(error="diretório de colaboradores ainda não sincronizado"), 503
+            linked = [
+                row["user_id"]
+                for row in conn.execute(
+                    "SELECT user_id FROM project_collaborators WHERE project_id = ?", (project_id,)
+                )
+            ]
+
+        ranked = get_skill_matrix().score(requirements, exclude_user_ids=linked, limit=limit)
+        if ranked:
+            placeholders = ",".join("?" for _ in ranked)
+            with get_conn() as conn:
+                details = {
+                    row["user_id"]: row
+                    for row in conn.execute(
+                        f"SELECT user_id, email, full_name, availability FROM collaborator_directory WHERE user_id IN ({placeholders})",
+                        [item["user_id"] for item in ranked],
+                    )
+                }
+            for item in ranked:
+                row = details.get(item["user_id"])
+                item["email"] = row["email"] if row else None
+                item["full_name"] = row["full_name"] if row else None
+                item["availability"] = row["availability"] if row else None
+
+        level_names = {value: name for name, value in PROFICIENCY_LEVELS.items()}
+        return jsonify(
+            project_id=project_id,
+            requirements=[{"skill": name, "level": level_names[level]} for name, level in requirements],
+            candidates=ranked,
+            synced_at=state["last_synced_at"],
+        )
+
     @app.get("/projects/<int:project_id>/collaborators")
     def list_project_collaborators(project_id: int):
         """Lista colaboradores de um projeto."""
         with get_conn() as conn:
+            # project_collaborators só recebe INSERTs e DELETEs: (quantidade, maior id) muda a cada escrita
+            version = conn.execute(
+                "SELECT COUNT(*), MAX(id) FROM project_collaborators WHERE project_id = ?", (project_id,)
+            ).fetchone()
+            cached = etag.not_modified(etag.make_etag("project_collaborators", project_id, *version))
+            if cached:
+                return cached
             rows = conn.execute(
                 """
                 SELECT id, user_id, skill_name, skill_level, created_at
@@ -201,20 +1234,9 @@ def create_app() -> Flask:
                 (user_id,)
             ).fetchall()
 
-        # Obter títulos dos projetos da API externa (melhor UX)
+        # Obter títulos dos projetos da API externa (melhor UX), via cache
         unique_ids = sorted({row["project_id"] for row in rows})
-        title_map: Dict[int, str] = {}
-        for pid in unique_ids:
-            try:
-                resp = requests.get(f"{PROJETOS_API_URL}/projects/{pid}", timeout=6)
-                if resp.status_code == 200:
-                    data = resp.json()
-                    # Tenta campos comuns: 'title' ou 'name'
-                    title_map[pid] = data.get("title") or data.get("name") or f"Projeto {pid}"
-                else:
-                    title_map[pid] = f"Projeto {pid}"
-            except requests.exceptions.RequestException:
-                title_map[pid] = f"Projeto {pid}"
+        title_map = _resolve_project_titles(unique_ids) if unique_ids else {}
 
         projects = [
             {
@@ -240,10 +1262,70 @@ def create_app() -> Flask:
             )
             if deleted.rowcount == 0:
                 return jsonify(error="Vínculo não encontrado"), 404
+            conn.execute(
+                """
+                UPDATE member_outbox SET status = 'cancelled'
+                WHERE project_id = ? AND user_id = ? AND status = 'pending'
+                """,
+                (project_id, user_id)
+            )
             conn.commit()
 
         return jsonify(message="Colaborador removido do projeto"), 200
 
+    @app.get("/outbox/status")
+    def outbox_status():
+        """Situação das notificações para a API externa de Projetos."""
+        with get_conn() as conn:
+            counts = conn.execute(
+                "SELECT status, COUNT(*) AS total FROM member_outbox GROUP BY status"
+            ).fetchall()
+            oldest_pending = conn.execute(
+                "SELECT MIN(created_at) AS created_at FROM member_outbox WHERE status = 'pending'"
+            ).fetchone()["created_at"]
+            recent_failures = conn.execute(
+                "SELECT * FROM member_outbox WHERE status = 'failed' ORDER BY id DESC LIMIT 10"
+            ).fetchall()
+        return jsonify(
+            counts={row["status"]: row["total"] for row in counts},
+            oldest_pending_created_at=oldest_pending,
+            recent_failures=[_serialize_outbox_row(r) for r in recent_failures],
+            generated_at=_now(),
+        )
+
+    @app.get("/projects/<int:project_id>/collaborators/<int:user_id>/notification")
+    def link_notification_status(project_id: int, user_id: int):
+        """Estado da última notificação enviada (ou pendente) para um vínculo."""
+        with get_conn() as conn:
+            row = conn.execute(
+                """
+                SELECT * FROM member_outbox
+                WHERE project_id = ? AND user_id = ?
+                ORDER BY id DESC LIMIT 1
+                """,
+                (project_id, user_id)
+            ).fetchone()
+        if not row:
+            return jsonify(error="Notificação não encontrada"), 404
+        return jsonify(notification=_serialize_outbox_row(row))
+
+    @app.post("/outbox/<int:outbox_id>/retry")
+    def retry_outbox_entry(outbox_id: int):
+        """Recoloca uma notificação que falhou na fila de entrega."""
+        with get_conn() as conn:
+            updated = conn.execute(
+                """
+                UPDATE member_outbox SET status = 'pending', attempts = 0, next_attempt_at = ?
+                WHERE id = ? AND status = 'failed'
+                """,
+                (time.time(), outbox_id)
+            ).rowcount
+            conn.commit()
+        if not updated:
+            return jsonify(error="Notificação não encontrada ou não está com falha"), 404
+        _outbox_wakeup.set()
+        return jsonify(message="Notificação reenfileirada", outbox_id=outbox_id), 202
+
     @app.get("/metrics")
     def metrics():
         """Métricas simples."""
@@ -264,28 +1346,60 @@ def create_app() -> Flask:
             total_links=total_links,
             unique_projects=unique_projects,
             unique_collaborators=unique_collaborators,
+            project_title_cache=_title_cache.stats(),
+            proxy_projects_cache=_proxy_cache.stats(),
+            circuit_breakers=http_client.breaker_states(),
+            outbound_singleflight=http_client.singleflight_stats(),
             generated_at=_now()
         )
 
     @app.get("/proxy/projects")
     def proxy_list_projects():
-        """Proxy para listar projetos da API externa (contorna CORS)."""
-        search_term = request.args.get("q", "")
-        
+        """Proxy para listar projetos da API externa (contorna CORS).
+
+        Respostas ficam em cache pelo termo exato repassado ao upstream (só os espaços são
+        normalizados; a busca da API externa pode diferenciar maiúsculas). Depois do TTL são
+        revalidadas com If-None-Match/If-Modified-Since e o corpo é repassado sem ser
+        decodificado.
+        """
+        search_term = " ".join(request.args.get("q", "").split())
+        state, cached = _proxy_cache.get(search_term)
+        if state == FRESH:
+            return _proxy_response(cached, "HIT")
+
+        headers = {}
+        if cached is not None:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
         try:
-            url = f"{PROJETOS_API_URL}/projects"
-            if search_term:
-                url += f"?q={search_term}"
-            
-            response = requests.get(url, timeout=10)
-            
-            if response.status_code == 200:
-                return jsonify(response.json())
-            else:
-                return jsonify(error="Erro ao buscar projetos", details=response.text), response.status_code
+            response = http_client.get(
+                f"{PROJETOS_API_URL}/projects",
+                params={"q": search_term} if search_term else None,
+                headers=headers or None,
+                timeout=10,
+            )
         except requests.exceptions.RequestException as e:
+            if cached is not None:
+                return _proxy_response(cached, "STALE")
             return jsonify(error=f"Erro de conexão: {str(e)}"), 500
 
+        if response.status_code == 304 and cached is not None:
+            _proxy_cache.set(search_term, cached)
+            return _proxy_response(cached, "REVALIDATED")
+        if response.status_code == 200:
+            entry = {
+                "body": response.content,
+                "content_type": response.headers.get("Content-Type", "application/json"),
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+            _proxy_cache.set(search_term, entry)
+            return _proxy_response(entry, "MISS")
+        return jsonify(error="Erro ao buscar projetos", details=response.text), response.status_code
+
     @app.get("/collaborators/search")
     def search_collaborator():
         """Agregador simples para o Idealizador buscar colaborador por email ou user_id.
@@ -296,10 +1410,33 @@ def create_app() -> Flask:
         email = (request.args.get("email") or "").strip().lower()
         user_id_param = request.args.get("user_id")
 
+        # Diretório local primeiro; usuários ainda não sincronizados caem na busca remota
+        synced_at = _directory_synced_at() if (email or user_id_param) else None
+        if synced_at:
+            with get_conn() as conn:
+                if email:
+                    row = conn.execute(
+                        "SELECT * FROM collaborator_directory WHERE email = ?", (email,)
+                    ).fetchone()
+                else:
+                    row = conn.execute(
+                        "SELECT * FROM collaborator_directory WHERE user_id = ?", (user_id_param,)
+                    ).fetchone()
+            if row:
+                return jsonify(
+                    collaborator={
+                        "user_id": row["user_id"],
+                        "email": row["email"],
+                        "profile": json.loads(row["profile_json"]) if row["profile_json"] else None,
+                        "skills": json.loads(row["skills_json"]),
+                    },
+                    synced_at=synced_at,
+                )
+
         user: Dict | None = None
         if email:
             try:
-                resp = requests.get(f"{AUTH_SERVICE_BASE}/users", params={"email": email}, timeout=6)
+                resp = http_client.get(f"{AUTH_SERVICE_BASE}/users", params={"email": email}, timeout=6)
                 if resp.status_code == 200:
                     user = resp.json().get("user")
                 else:
@@ -308,7 +1445,7 @@ def create_app() -> Flask:
                 return jsonify(error=f"falha ao consultar auth: {str(e)}"), 502
         elif user_id_param:
             try:
-                resp = requests.get(f"{AUTH_SERVICE_BASE}/users/{user_id_param}", timeout=6)
+                resp = http_client.get(f"{AUTH_SERVICE_BASE}/users/{user_id_param}", timeout=6)
                 if resp.status_code == 200:
                     user = resp.json().get("user")
                 else:
@@ -322,18 +1459,10 @@ def create_app() -> Flask:
         if not uid:
             return jsonify(error="usuário inválido"), 404
 
-        # Obter perfil e skills
-        try:
-            prof_res = requests.get(f"{PROFILE_SERVICE_BASE}/profiles/{uid}", timeout=6)
-            profile = prof_res.json().get("profile") if prof_res.status_code == 200 else None
-        except requests.exceptions.RequestException:
-            profile = None
-
-        try:
-            skills_res = requests.get(f"{SKILLS_SERVICE_BASE}/users/{uid}/skills", timeout=6)
-            skills = skills_res.json().get("skills", []) if skills_res.status_code == 200 else []
-        except requests.exceptions.RequestException:
-            skills = []
+        # Obter perfil e skills (em paralelo)
+        profiles, skills_by_user = _fetch_details_concurrently([uid])
+        profile = profiles.get(uid)
+        skills = skills_by_user.get(uid, [])
 
         return jsonify(
             collaborator={
@@ -344,11 +1473,111 @@ def create_app() -> Flask:
             }
         )
 
+    @app.get("/collaborators/export")
+    def export_collaborators():
+        """Exporta todos os colaboradores em NDJSON (um JSON por linha), em streaming."""
+        def generate():
+            try:
+                for item in iter_collaborators_export():
+                    yield json.dumps(item, ensure_ascii=False) + "\n"
+            except (requests.exceptions.RequestException, ValueError) as e:
+                # O status 200 já foi enviado: sinaliza a falha na última linha
+                yield json.dumps({"error": f"export interrompido: {str(e)}"}, ensure_ascii=False) + "\n"
+
+        return Response(generate(), mimetype="application/x-ndjson")
+
+    @app.post("/collaborators/directory/sync")
+    def trigger_directory_sync():
+        """Força uma sincronização do diretório local de colaboradores."""
+        # A sincronização percorre o diretório inteiro; o prazo da requisição não vale
+        # aqui, cada chamada em lote já tem seu próprio timeout
+        with http_client.deadline(None):
+            result = sync_collaborator_directory()
+        if result.get("skipped"):
+            return jsonify(message="sincronização já em andamento"), 202
+        if result.get("error"):
+            return jsonify(error=f"falha na sincronização: {result['error']}"), 502
+        return jsonify(result=result, synced_at=_directory_synced_at())
+
+    @app.get("/collaborators/directory/status")
+    def directory_status():
+        with get_conn() as conn:
+            state = conn.execute(
+                "SELECT last_synced_at, users, changed FROM directory_sync_state WHERE id = 1"
+            ).fetchone()
+            rows = conn.execute("SELECT COUNT(*) FROM collaborator_directory").fetchone()[0]
+        return jsonify(
+            enabled=DIRECTORY_SYNC_ENABLED,
+            rows=rows,
+            last_synced_at=state["last_synced_at"] if state else None,
+            last_sync_users=state["users"] if state else None,
+            last_sync_changed=state["changed"] if state else None,
+            fresh=_directory_synced_at() is not None,
+        )
+
+    def filter_collaborators(page: int, page_size: int):
+        raw_skill = request.args.get("skill")
+        skill = skill_key(raw_skill)
+        if raw_skill and not skill:
+            return jsonify(error="skill não pode ser vazio"), 400
+        min_level_name = (request.args.get("min_level") or "").strip().lower()
+        availability = (request.args.get("availability") or "").strip()
+
+        if min_level_name and min_level_name not in PROFICIENCY_LEVELS:
+            return jsonify(error="min_level deve ser basic, intermediate ou advanced"), 400
+        if min_level_name and not skill:
+            return jsonify(error="min_level exige o parâmetro skill"), 400
+        if availability and availability not in ALLOWED_AVAILABILITY:
+            return jsonify(error="availability deve ser 'actively-looking' ou 'exploring'"), 400
+
+        # Os filtros só existem no diretório local; sem sincronização recente não há fallback
+        synced_at = _directory_synced_at()
+        if not synced_at:
+            return jsonify(error="diretório de colaboradores não sincronizado ou desatualizado"), 503
+
+        with get_conn() as conn:
+            if skill:
+                query = """
+                    FROM collaborator_directory d
+                    WHERE d.user_id IN (
+                        SELECT user_id FROM collaborator_skill_index
+                        WHERE skill_key = ? AND level >= ?
+                    )
+                """
+                params: List = [skill, PROFICIENCY_LEVELS.get(min_level_name, 1)]
+                if availability:
+                    query += " AND d.availability = ?"
+                    params.append(availability)
+            else:
+                query = "FROM collaborator_directory d WHERE d.availability = ?"
+                params = [availability]
+
+            total = conn.execute(f"SELECT COUNT(*) {query}", params).fetchone()[0]
+            rows = conn.execute(
+                f"""
+                SELECT d.user_id, d.email, d.full_name, d.availability, d.skills_json
+                {query}
+                ORDER BY d.user_id ASC
+                LIMIT ? OFFSET ?
+                """,
+                [*params, page_size, (page - 1) * page_size],
+            ).fetchall()
+
+        return jsonify(
+            page=page,
+            page_size=page_size,
+            total=total,
+            collaborators=[_serialize_directory_row(r) for r in rows],
+            synced_at=synced_at,
+        )
+
     @app.get("/collaborators")
     def list_collaborators():
         """Lista colaboradores com informações principais: email, disponibilidade e skills.
 
         Query params opcionais: page (1..), page_size (1..200)
+        Filtros (atendidos pelo diretório local): skill, min_level (basic|intermediate|advanced),
+        availability (actively-looking|exploring)
         """
         try:
             page = max(1, int(request.args.get("page", 1)))
@@ -360,48 +1589,52 @@ def create_app() -> Flask:
             page_size = 50
         page_size = min(max(1, page_size), 200)
 
-        # Obter lista de usuários do auth_service
+        if any(request.args.get(k) for k in ("skill", "min_level", "availability")):
+            return filter_collaborators(page, page_size)
+
+        synced_at = _directory_synced_at()
+        if synced_at:
+            with get_conn() as conn:
+                total = conn.execute("SELECT COUNT(*) FROM collaborator_directory").fetchone()[0]
+                rows = conn.execute(
+                    """
+                    SELECT user_id, email, full_name, availability, skills_json
+                    FROM collaborator_directory
+                    ORDER BY user_id ASC
+                    LIMIT ? OFFSET ?
+                    """,
+                    (page_size, (page - 1) * page_size),
+                ).fetchall()
+            return jsonify(
+                page=page,
+                page_size=page_size,
+                total=total,
+                collaborators=[_serialize_directory_row(r) for r in rows],
+                synced_at=synced_at,
+            )
+
+        # Diretório local ausente ou desatualizado: montar a página a partir dos serviços
         try:
-            users_res = requests.get(f"{AUTH_SERVICE_BASE}/users/list", timeout=10)
-            if not users_res.ok:
-                return jsonify(error="falha ao listar usuários"), 502
-            all_users = users_res.json().get("users", [])
+            users_slice, total = _fetch_users_window((page - 1) * page_size, page_size)
+        except requests.exceptions.HTTPError:
+            return jsonify(error="falha ao listar usuários"), 502
         except requests.exceptions.RequestException as e:
             return jsonify(error=f"falha de conexão com auth: {str(e)}"), 502
 
-        total = len(all_users)
-        start = (page - 1) * page_size
-        end = start + page_size
-        users_slice = all_users[start:end]
+        profiles, skills_by_user = _fetch_details_bulk([u.get("id") for u in users_slice])
 
         collaborators: List[Dict] = []
         for u in users_slice:
             uid = u.get("id")
-            email = u.get("email")
-            # Perfil (para disponibilidade e nome)
-            try:
-                prof_res = requests.get(f"{PROFILE_SERVICE_BASE}/profiles/{uid}", timeout=6)
-                profile = prof_res.json().get("profile") if prof_res.status_code == 200 else None
-            except requests.exceptions.RequestException:
-                profile = None
-
-            availability = (profile or {}).get("availability") if profile else None
-            full_name = (profile or {}).get("full_name") if profile else None
-
-            # Skills
-            try:
-                skills_res = requests.get(f"{SKILLS_SERVICE_BASE}/users/{uid}/skills", timeout=6)
-                skills = skills_res.json().get("skills", []) if skills_res.status_code == 200 else []
-            except requests.exceptions.RequestException:
-                skills = []
+            profile = profiles.get(uid)
 
             collaborators.append(
                 {
                     "user_id": uid,
-                    "email": email,
-                    "full_name": full_name,
-                    "availability": availability,  # 'actively-looking' | 'exploring' | None
-                    "skills": skills,  # [{skill_name, proficiency, id?}]
+                    "email": u.get("email"),
+                    "full_name": (profile or {}).get("full_name"),
+                    "availability": (profile or {}).get("availability"),  # 'actively-looking' | 'exploring' | None
+                    "skills": skills_by_user.get(uid, []),  # [{skill_name, proficiency, id?}]
                 }
             )
 
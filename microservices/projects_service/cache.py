@@ -0,0 +1,89 @@
+"""Cache em memória (LRU limitado + TTL) usado para respostas de serviços externos."""
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Hashable, Tuple
+
+import time
+
+
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+
+class TTLCache:
+    """LRU limitado e thread-safe com expiração por entrada.
+
+    Cada entrada é "fresca" até ``ttl`` segundos e, depois disso, ainda pode ser servida
+    como "velha" por mais ``stale_ttl`` segundos enquanto o chamador a revalida
+    (stale-while-revalidate). Valores ``None`` são válidos e servem como cache negativo.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, stale_ttl: float = 0.0):
+        self.maxsize = max(1, maxsize)
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._data: "OrderedDict[Hashable, Tuple[Any, float, float, float]]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Tuple[str, Any]:
+        """Retorna ``(estado, valor)`` onde estado é FRESH, STALE ou MISS."""
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISS, None
+            value, stored_at, ttl, stale_ttl = entry
+            age = now - stored_at
+            if age >= ttl + stale_ttl:
+                del self._data[key]
+                self.misses += 1
+                return MISS, None
+            self._data.move_to_end(key)
+            if age < ttl:
+                self.hits += 1
+                return FRESH, value
+            self.stale_hits += 1
+            return STALE, value
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: float | None = None,
+        stale_ttl: float | None = None,
+        stored_at: float | None = None,
+    ) -> None:
+        entry = (
+            value,
+            stored_at if stored_at is not None else time.time(),
+            self.ttl if ttl is None else ttl,
+            self.stale_ttl if stale_ttl is None else stale_ttl,
+        )
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,308 @@
+"""Cliente HTTP de saída compartilhado pelo serviço.
+
+Todas as chamadas para outros serviços (auth, profile, skills e a API do bdprojetos) passam
+por uma única ``requests.Session``: cada host mantém seu próprio pool de conexões
+keep-alive, evitando um novo handshake TCP+TLS a cada chamada. GETs (idempotentes) são
+repetidos com backoff exponencial em falhas de conexão, timeouts e respostas 502/503/504;
+as novas tentativas respeitam o prazo da requisição (nenhuma começa depois dele).
+
+Cada host tem um circuit breaker: depois de CIRCUIT_FAILURE_THRESHOLD falhas seguidas
+as chamadas falham na hora (``CircuitOpenError``) até CIRCUIT_RESET_TIMEOUT passar, quando
+uma única chamada de teste (half-open) decide se o circuito fecha. Um prazo por requisição
+(``deadline``) limita o timeout de cada chamada ao tempo que ainda resta; um timeout causado
+só por esse corte não conta como falha do host.
+
+GETs idênticos feitos ao mesmo tempo (mesma URL, parâmetros e cabeçalhos) são coalescidos
+(single-flight): só o primeiro vai à rede e os demais esperam e recebem a mesma resposta.
+Se o primeiro falhar por timeout só porque o prazo dele era curto, cada um dos demais faz
+a própria chamada dentro do seu prazo.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Event, Lock
+from typing import Dict, Hashable, Iterator
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+
+import os
+import requests
+import time
+
+
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))  # hosts com pool próprio
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "32"))  # conexões mantidas por host
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.2"))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))
+SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT_ENABLED", "1") == "1"
+RETRY_METHODS = frozenset({"GET", "HEAD"})
+RETRY_STATUSES = frozenset({502, 503, 504})
+
+_session: requests.Session | None = None
+_session_lock = Lock()
+_deadline: ContextVar[float | None] = ContextVar("http_deadline", default=None)
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """O circuito do host está aberto; a chamada nem chegou a ser feita."""
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """O prazo da requisição atual acabou antes da chamada."""
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self._lock = Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self.probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self.probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """A chamada terminou sem dizer nada sobre a saúde do host (ex.: cortada pelo prazo)."""
+        with self._lock:
+            self.probe_in_flight = False
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {"state": self.state, "consecutive_failures": self.failures}
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = Lock()
+
+
+def breaker_for(url: str) -> CircuitBreaker:
+    host = urlsplit(url).netloc
+    with _breakers_lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = CircuitBreaker(host, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT)
+            _breakers[host] = breaker
+        return breaker
+
+
+def breaker_states() -> Dict[str, Dict]:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {b.name: b.snapshot() for b in breakers}
+
+
+@contextmanager
+def deadline(seconds: float | None) -> Iterator[None]:
+    """Define o prazo total das chamadas feitas dentro do bloco (inclusive em threads
+    que rodem com uma cópia do contexto atual). ``None`` remove o prazo herdado, para
+    trabalhos longos disparados de dentro de uma requisição."""
+    token = _deadline.set(None if seconds is None else time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time() -> float | None:
+    """Segundos restantes do prazo atual, ou None quando não há prazo."""
+    expires_at = _deadline.get()
+    if expires_at is None:
+        return None
+    return max(0.0, expires_at - time.monotonic())
+
+
+def _build_session() -> requests.Session:
+    # Sem retries no adapter: eles repetiriam a chamada com o mesmo timeout, ignorando o
+    # prazo da requisição. As novas tentativas ficam em request().
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=0,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Retorna a sessão compartilhada, criando-a na primeira chamada."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def _attempt(method: str, url: str, breaker: CircuitBreaker, kwargs: Dict) -> requests.Response:
+    """Uma tentativa, com o timeout cortado pelo prazo e o resultado contado no breaker."""
+    timeout = kwargs.get("timeout")
+    remaining = remaining_time()
+    if remaining is not None:
+        if remaining <= 0:
+            raise DeadlineExceeded(f"prazo esgotado antes de {method} {url}")
+        if timeout is None or remaining < timeout:
+            kwargs = dict(kwargs, timeout=remaining)
+        else:
+            remaining = None  # o timeout pedido cabe no prazo: não foi cortado
+
+    if not breaker.allow():
+        raise CircuitOpenError(f"circuito aberto para {breaker.name}")
+    try:
+        response = get_session().request(method, url, **kwargs)
+    except requests.exceptions.Timeout:
+        if remaining is not None:
+            # Timeout por falta de prazo do chamador, não por lentidão do host
+            breaker.release()
+        else:
+            breaker.record_failure()
+        raise
+    except Exception:
+        breaker.record_failure()
+        raise
+    if response.status_code >= 500:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    return response
+
+
+def _wait_backoff(attempt: int) -> bool:
+    """Espera antes da próxima tentativa; False quando o prazo não comporta a espera."""
+    backoff = HTTP_BACKOFF_FACTOR * (2 ** attempt)
+    remaining = remaining_time()
+    if remaining is not None and remaining <= backoff:
+        return False
+    time.sleep(backoff)
+    return True
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    breaker = breaker_for(url)
+    retries = HTTP_MAX_RETRIES if method.upper() in RETRY_METHODS else 0
+    for attempt in range(retries + 1):
+        try:
+            response = _attempt(method, url, breaker, kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if attempt == retries or isinstance(e, DeadlineExceeded) or not _wait_backoff(attempt):
+                raise
+            continue
+        if response.status_code not in RETRY_STATUSES or attempt == retries or not _wait_backoff(attempt):
+            return response
+        response.close()
+    raise AssertionError("unreachable")
+
+
+class _InFlight:
+    def __init__(self):
+        self.done = Event()
+        self.response: requests.Response | None = None
+        self.error: BaseException | None = None
+        self.deadline_bound = False  # o timeout do líder foi cortado pelo prazo dele
+
+
+_inflight: Dict[Hashable, _InFlight] = {}
+_inflight_lock = Lock()
+_singleflight_counts = {"leaders": 0, "coalesced": 0}
+
+
+def _flight_key(url: str, kwargs: Dict) -> Hashable | None:
+    if kwargs.get("stream") or set(kwargs) - {"params", "headers", "timeout"}:
+        return None
+    params = kwargs.get("params") or {}
+    headers = kwargs.get("headers") or {}
+    try:
+        return (
+            url,
+            tuple(sorted((str(k), str(v)) for k, v in dict(params).items())),
+            tuple(sorted((str(k).lower(), str(v)) for k, v in headers.items())),
+        )
+    except (TypeError, ValueError):
+        return None
+
+
+def singleflight_stats() -> Dict[str, int]:
+    with _inflight_lock:
+        return dict(_singleflight_counts, in_flight=len(_inflight))
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    key = _flight_key(url, kwargs) if SINGLEFLIGHT_ENABLED else None
+    if key is None:
+        return request("GET", url, **kwargs)
+
+    with _inflight_lock:
+        call = _inflight.get(key)
+        leader = call is None
+        if leader:
+            call = _InFlight()
+            _inflight[key] = call
+            _singleflight_counts["leaders"] += 1
+        else:
+            _singleflight_counts["coalesced"] += 1
+
+    if not leader:
+        wait_for = kwargs.get("timeout")
+        remaining = remaining_time()
+        if remaining is not None:
+            wait_for = remaining if wait_for is None else min(wait_for, remaining)
+        if not call.done.wait(wait_for):
+            raise requests.exceptions.Timeout(f"tempo esgotado aguardando GET {url} em andamento")
+        if call.error is not None:
+            if call.deadline_bound and isinstance(call.error, requests.exceptions.Timeout):
+                # O líder só estourou o próprio prazo; este chamador tenta com o seu
+                return request("GET", url, **kwargs)
+            raise call.error
+        return call.response
+
+    remaining = remaining_time()
+    timeout = kwargs.get("timeout")
+    call.deadline_bound = remaining is not None and (timeout is None or remaining < timeout)
+    try:
+        call.response = request("GET", url, **kwargs)
+        return call.response
+    except BaseException as e:
+        call.error = e
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        call.done.set()
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
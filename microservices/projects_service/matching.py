@@ -0,0 +1,115 @@
+"""Motor de recomendação de colaboradores para projetos.
+
+Mantém em memória uma matriz compacta usuários × skills (uint8 com o nível de
+proficiência: 0 = não tem, 1 = basic, 2 = intermediate, 3 = advanced) montada a partir
+do diretório local, e pontua todos os candidatos de uma vez com operações vetorizadas.
+"""
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import json
+import numpy as np
+
+
+# Peso da disponibilidade no score final
+AVAILABILITY_WEIGHTS = {"actively-looking": 1.0, "exploring": 0.8}
+UNKNOWN_AVAILABILITY_WEIGHT = 0.6
+
+
+def skill_key(name) -> str:
+    """Forma normalizada do nome de uma skill. Também é registrada como função SQL no
+    SQLite (o lower() nativo só trata ASCII), para o índice e a matriz concordarem."""
+    return ("" if name is None else str(name)).strip().lower()
+
+
+class SkillMatrix:
+    """Matriz usuários × skills construída a partir de linhas do collaborator_directory."""
+
+    def __init__(
+        self,
+        user_ids: np.ndarray,
+        levels: np.ndarray,
+        availability: np.ndarray,
+        skill_columns: Dict[str, int],
+    ):
+        self.user_ids = user_ids
+        self.levels = levels
+        self.availability = availability
+        self.skill_columns = skill_columns
+
+    @classmethod
+    def build(cls, rows: Iterable, proficiency_levels: Dict[str, int]) -> "SkillMatrix":
+        """rows: (user_id, availability, skills_json)."""
+        user_ids: List[int] = []
+        availability: List[float] = []
+        skill_columns: Dict[str, int] = {}
+        cells: List[Tuple[int, int, int]] = []
+        for row_index, (user_id, user_availability, skills_json) in enumerate(rows):
+            user_ids.append(user_id)
+            availability.append(AVAILABILITY_WEIGHTS.get(user_availability, UNKNOWN_AVAILABILITY_WEIGHT))
+            for skill in json.loads(skills_json or "[]"):
+                name = skill_key(skill.get("skill_name"))
+                if not name:
+                    continue
+                column = skill_columns.setdefault(name, len(skill_columns))
+                cells.append((row_index, column, proficiency_levels.get(skill.get("proficiency"), 1)))
+
+        levels = np.zeros((len(user_ids), max(1, len(skill_columns))), dtype=np.uint8)
+        if cells:
+            rows_idx, cols_idx, values = (np.array(axis) for axis in zip(*cells))
+            # Mesmo skill repetido para um usuário: vale o maior nível
+            np.maximum.at(levels, (rows_idx, cols_idx), values.astype(np.uint8))
+        return cls(
+            np.array(user_ids, dtype=np.int64),
+            levels,
+            np.array(availability, dtype=np.float32),
+            skill_columns,
+        )
+
+    def score(
+        self,
+        requirements: Sequence[Tuple[str, int]],
+        exclude_user_ids: Iterable[int] = (),
+        limit: int = 20,
+    ) -> List[Dict]:
+        """Ranqueia candidatos pela cobertura ponderada das skills exigidas.
+
+        Cobertura de cada skill = min(nível do usuário / nível exigido, 1); o peso de cada
+        skill é o nível exigido. O score final multiplica a cobertura pela disponibilidade.
+        Usuários sem nenhuma skill exigida ou em ``exclude_user_ids`` ficam de fora.
+        """
+        if not len(self.user_ids) or not requirements:
+            return []
+
+        required = np.array([level for _, level in requirements], dtype=np.float32)
+        coverage = np.zeros((len(self.user_ids), len(requirements)), dtype=np.float32)
+        for j, (skill, _) in enumerate(requirements):
+            column = self.skill_columns.get(skill)
+            if column is not None:
+                coverage[:, j] = self.levels[:, column]
+        coverage = np.minimum(coverage / required, 1.0)
+
+        weighted = coverage @ required / required.sum()
+        scores = weighted * self.availability
+
+        eligible = weighted > 0
+        exclude = np.fromiter(exclude_user_ids, dtype=np.int64)
+        if exclude.size:
+            eligible &= ~np.isin(self.user_ids, exclude)
+        candidates = np.flatnonzero(eligible)
+        if not candidates.size:
+            return []
+
+        limit = min(limit, candidates.size)
+        top = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        top = top[np.lexsort((self.user_ids[top], -scores[top]))]
+        return [
+            {
+                "user_id": int(self.user_ids[i]),
+                "score": round(float(scores[i]), 4),
+                "coverage": round(float(weighted[i]), 4),
+                "skills_covered": {
+                    skill: round(float(coverage[i, j]), 4) for j, (skill, _) in enumerate(requirements)
+                },
+            }
+            for i in top
+        ]
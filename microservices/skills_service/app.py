@@ -7,10 +7,13 @@ from flask_cors import CORS
 
 import sqlite3
 
+import etag
+
 
 DATABASE_PATH = Path(__file__).with_name("skills.db")
 DEFAULT_SKILLS = ["Python", "UX/UI Design", "Gestão de Projetos", "Data Science"]
 ALLOWED_PROFICIENCIES = {"basic", "intermediate", "advanced"}
+MAX_BULK_IDS = 500
 
 
 def _now() -> str:
@@ -48,6 +51,7 @@ def init_db():
             )
             """
         )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_user_skills_user_id ON user_skills (user_id)")
         conn.commit()
 
         for skill_name in DEFAULT_SKILLS:
@@ -73,10 +77,24 @@ def serialize_user_skill(row: sqlite3.Row) -> Dict:
     }
 
 
+def _parse_id_list(raw: str) -> List[int] | None:
+    """Parse a comma separated id list ("1,2,3"); returns None when malformed."""
+    ids: List[int] = []
+    for part in raw.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if not part.isdigit():
+            return None
+        ids.append(int(part))
+    return list(dict.fromkeys(ids))
+
+
 def create_app() -> Flask:
     init_db()
     app = Flask(__name__)
     CORS(app)
+    etag.init_app(app)
 
     @app.get("/health")
     def health():
@@ -84,6 +102,8 @@ def create_app() -> Flask:
 
     @app.get("/skills")
     def list_skills():
+        # Sem versão barata: o status de uma skill muda por UPSERT (scripts/seed_demo_data.py),
+        # então o ETag fica com o hash do corpo, que o etag.init_app calcula. O catálogo é pequeno.
         with get_conn() as conn:
             rows = conn.execute(
                 "SELECT id, name, status, created_at FROM skills ORDER BY name ASC"
@@ -117,6 +137,37 @@ def create_app() -> Flask:
             ).fetchone()
         return jsonify(skill=serialize_skill(created)), 201
 
+    @app.get("/skills/by-users")
+    def list_skills_by_users():
+        """Skills de vários usuários em uma consulta: /skills/by-users?user_ids=1,2,3"""
+        user_ids = _parse_id_list(request.args.get("user_ids", ""))
+        if user_ids is None:
+            return jsonify(error="user_ids deve ser uma lista de inteiros separados por vírgula"), 400
+        if len(user_ids) > MAX_BULK_IDS:
+            return jsonify(error=f"no máximo {MAX_BULK_IDS} user_ids por requisição"), 400
+        if not user_ids:
+            return jsonify(users=[])
+
+        placeholders = ",".join("?" for _ in user_ids)
+        with get_conn() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT us.id, us.user_id, us.skill_id, us.proficiency, us.created_at, s.name AS skill_name
+                FROM user_skills us
+                JOIN skills s ON us.skill_id = s.id
+                WHERE us.user_id IN ({placeholders})
+                ORDER BY us.user_id ASC, us.created_at DESC
+                """,
+                user_ids,
+            ).fetchall()
+
+        skills_by_user: Dict[int, List[Dict]] = {uid: [] for uid in user_ids}
+        for row in rows:
+            skills_by_user[row["user_id"]].append(serialize_user_skill(row))
+        return jsonify(
+            users=[{"user_id": uid, "skills": skills} for uid, skills in skills_by_user.items()]
+        )
+
     @app.post("/users/<int:user_id>/skills")
     def add_user_skill(user_id: int):
         payload = request.get_json(silent=True) or {}
@@ -159,6 +210,13 @@ def create_app() -> Flask:
     @app.get("/users/<int:user_id>/skills")
     def list_user_skills(user_id: int):
         with get_conn() as conn:
+            # user_skills só recebe INSERTs e DELETEs: (quantidade, maior id) muda a cada escrita
+            version = conn.execute(
+                "SELECT COUNT(*), MAX(id) FROM user_skills WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            cached = etag.not_modified(etag.make_etag("user_skills", user_id, *version))
+            if cached:
+                return cached
             rows = conn.execute(
                 """
                 SELECT us.id, us.user_id, us.skill_id, us.proficiency, us.created_at, s.name AS skill_name